@@ -14,6 +14,7 @@ ui.on_connect(onUIConnected);
 ui.on_disconnect(onUIDisconnected);
 ui.on_message('detection_result', handleDetectionResult);
 ui.on_message('detection_error', handleDetectionError);
+ui.on_message('batch_done', handleBatchDone);
 function onUIConnected() {
   if (errorContainer) {
     errorContainer.style.display = 'none';
@@ -443,6 +444,7 @@ function sendDetectionRequest() {
   ui.send_message('detect_anomalies', {
     image: currentImage,
     confidence: confidence,
+    tiled: document.getElementById('tiledToggle').checked,
   });
 }
 
@@ -499,6 +501,13 @@ function displayImage(imageSrc, container) {
 }
 
 function handleDetectionResult(data) {
+  if (data.batch_id) {
+    // Batch inspection results are streamed one image at a time: only report the progress
+    console.log(`📥 Batch ${data.batch_id}: ${data.name}`, data);
+    showStatus(`Batch ${data.batch_id}: ${data.progress.done}/${data.progress.total} images inspected`, 'info');
+    return;
+  }
+
   if (data.error) {
     showError(`Detection failed: ${data.error}`);
     setButtonState('ready');
@@ -515,7 +524,16 @@ function handleDetectionResult(data) {
     // Show result title and download button
     showResultHeader();
 
-    showStatus('Detection completed successfully!', 'success');
+    if (data.tiles) {
+      console.table(data.tiles.map(tile => ({ box: tile.box.join(', '), ms: tile.ms, count: tile.count })));
+      const slowest = Math.max(...data.tiles.map(tile => tile.ms));
+      showStatus(
+        `Detection completed successfully! ${data.tile_count} tiles in ${data.processing_time} (slowest tile ${slowest.toFixed(0)} ms)`,
+        'success'
+      );
+    } else {
+      showStatus('Detection completed successfully!', 'success');
+    }
   } else {
     showError('No result image received from detection');
     setButtonState('ready');
@@ -525,6 +543,14 @@ function handleDetectionResult(data) {
   setButtonState('completed');
 }
 
+function handleBatchDone(data) {
+  console.log('📥 Received batch_done:', data);
+  showStatus(
+    `Batch ${data.job_id} ${data.state}: ${data.done}/${data.total} images, ${data.failed} failed, in ${data.elapsed_s} s`,
+    data.failed ? 'error' : 'success'
+  );
+}
+
 function handleDetectionError(data) {
   showError(`Anomaly detection failed: ${data.error}`);
   setButtonState('ready');
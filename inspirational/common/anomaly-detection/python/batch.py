@@ -0,0 +1,141 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import csv
+import json
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+SUMMARY_FIELDS = ("name", "anomalies", "max_score", "processing_ms", "error")
+
+
+def list_images(source: Path) -> list[str]:
+    """Names of the images in a directory (recursively) or in a ZIP archive, sorted."""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            names = [n for n in archive.namelist() if Path(n).suffix.lower() in IMAGE_EXTENSIONS]
+    elif source.is_dir():
+        names = [str(p.relative_to(source)) for p in source.rglob("*")
+                 if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS]
+    else:
+        raise ValueError(f"{source} is neither a directory nor a ZIP archive")
+    return sorted(names)
+
+
+class BatchJob:
+    """Inspects every image of a directory or ZIP archive, streaming results as they complete.
+
+    Files are read one at a time by the job thread (a ZipFile cannot be read from several
+    threads), and decoded and analysed on `workers` threads. At most `2 * workers` images
+    are in memory at once. When the job ends, the summary is written as CSV and JSON to
+    `output_dir`.
+
+    Args:
+        job_id (str): identifier, used for the summary file names
+        source (Path): directory or ZIP archive
+        analyze (callable): `analyze(image_bytes)` returning (event dict, summary row dict)
+        on_result (callable): called with (job, name, event) as each image completes
+        on_done (callable): called with the job when it ends
+        output_dir (Path): where the summary files are written
+        workers (int): images analysed in parallel
+    """
+    def __init__(self, job_id: str, source: Path, analyze, on_result, on_done, output_dir: Path, workers: int = 2):
+        self.job_id = job_id
+        self.source = source
+        self.analyze = analyze
+        self.on_result = on_result
+        self.on_done = on_done
+        self.output_dir = output_dir
+        self.workers = workers
+        self.names = list_images(source)
+        self.rows = []
+        self.state = "pending"
+        self.started = None
+        self.finished = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._run, name=f"batch-{self.job_id}", daemon=True).start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def status(self) -> dict:
+        with self._lock:
+            done = len(self.rows)
+            failed = sum(1 for row in self.rows if row["error"])
+        end = self.finished or time.time()
+        return {
+            "job_id": self.job_id,
+            "source": str(self.source),
+            "state": self.state,
+            "total": len(self.names),
+            "done": done,
+            "failed": failed,
+            "elapsed_s": round(end - self.started, 2) if self.started else 0.0,
+        }
+
+    def summary_path(self, fmt: str) -> Path:
+        return self.output_dir / f"{self.job_id}.{fmt}"
+
+    def _run(self):
+        self.state = "running"
+        self.started = time.time()
+        in_flight = threading.Semaphore(2 * self.workers)
+        archive = zipfile.ZipFile(self.source) if zipfile.is_zipfile(self.source) else None
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"batch-{self.job_id}") as executor:
+                for name in self.names:
+                    in_flight.acquire()
+                    if self._cancelled.is_set():
+                        in_flight.release()
+                        break
+                    try:
+                        data = archive.read(name) if archive else (self.source / name).read_bytes()
+                    except Exception as e:
+                        self._complete(name, None, {"name": name, "error": str(e)})
+                        in_flight.release()
+                        continue
+                    future = executor.submit(self._process, name, data)
+                    future.add_done_callback(lambda _: in_flight.release())
+        finally:
+            if archive:
+                archive.close()
+        self.state = "cancelled" if self._cancelled.is_set() else "completed"
+        self.finished = time.time()
+        self._write_summary()
+        self.on_done(self)
+
+    def _process(self, name: str, data: bytes):
+        start = time.perf_counter()
+        try:
+            event, row = self.analyze(data)
+        except Exception as e:
+            event, row = None, {"error": str(e)}
+        row = dict(row, name=name, processing_ms=round((time.perf_counter() - start) * 1000, 2))
+        self._complete(name, event, row)
+
+    def _complete(self, name: str, event: dict | None, row: dict):
+        row = {field: row.get(field, "") for field in SUMMARY_FIELDS}
+        with self._lock:
+            self.rows.append(row)
+        if event is None:
+            event = {"success": False, "error": row["error"]}
+        self.on_result(self, name, event)
+
+    def _write_summary(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            rows = sorted(self.rows, key=lambda row: row["name"])
+        with open(self.summary_path("csv"), "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        with open(self.summary_path("json"), "w") as f:
+            json.dump({"status": self.status(), "images": rows}, f, indent=2)
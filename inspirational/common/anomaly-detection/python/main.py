@@ -7,62 +7,181 @@ from arduino.app_utils.image import draw_anomaly_markers
 from arduino.app_bricks.web_ui import WebUI
 from arduino.app_bricks.visual_anomaly_detection import VisualAnomalyDetection
 from PIL import Image
+from cache import ResultCache
+from tiling import detect_tiled
+from batch import BatchJob
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.responses import Response
 import io
 import base64
 import time
 import os
+import uuid
 from pathlib import Path
 
+# Number of images whose anomalies are kept, so the sample images are only analysed once
+CACHE_SIZE = 32
+# Tiled mode: high resolution images are inspected as overlapping tiles of TILE_SIZE pixels,
+# so small defects are not lost when the whole image is scaled down to the model input
+TILE_SIZE = 512
+TILE_OVERLAP = 64
+TILE_WORKERS = 1  # the model Brick is called from these threads, keep 1 unless it is safe to call concurrently
+
 anomaly_detection = VisualAnomalyDetection()
+cache = ResultCache(max_entries=CACHE_SIZE)
+tile_executor = ThreadPoolExecutor(max_workers=TILE_WORKERS, thread_name_prefix="tile")
 
 SCRIPT_DIR = Path(__file__).resolve().parent.parent
 IMAGES_DIR = SCRIPT_DIR / "assets"
 os.makedirs(IMAGES_DIR, exist_ok=True)
 
+# Batch inspection: images analysed in parallel (1, like TILE_WORKERS, as long as the model Brick
+# may not be called concurrently), where the inspected folders or ZIP archives must be placed and
+# where the CSV/JSON summaries are written
+BATCH_WORKERS = 1
+BATCH_INPUT_DIR = SCRIPT_DIR / "batch_images"
+BATCH_OUTPUT_DIR = SCRIPT_DIR / "batch_results"
+os.makedirs(BATCH_INPUT_DIR, exist_ok=True)
+batch_jobs = {}
+
+def analyze_image(image_bytes: bytes, tiled: bool = False, include_image: bool = True) -> tuple[dict, dict]:
+    """Run anomaly detection on an image.
+
+    Returns:
+        tuple: (detection_result message, summary row with the anomaly count and highest score)
+    """
+    pil_image = Image.open(io.BytesIO(image_bytes))
+
+    start_time = time.time() * 1000
+    # The model has no threshold here, so cached results serve any request for the same image
+    key = ResultCache.key(image_bytes) + (":tiled" if tiled else "")
+    cached_entry = cache.get(key)
+    cached = cached_entry is not None
+    if cached:
+        results, tiles = cached_entry
+    elif tiled:
+        results, tiles = detect_tiled(pil_image, anomaly_detection.detect, tile_executor,
+                                      tile_size=TILE_SIZE, overlap=TILE_OVERLAP)
+        cache.put(key, (results, tiles))
+    else:
+        results, tiles = anomaly_detection.detect(pil_image), None
+        if results is not None:
+            cache.put(key, (results, tiles))
+    diff = time.time() * 1000 - start_time
+
+    if results is None:
+        raise RuntimeError('No results returned')
+
+    detections = results.get("detection", [])
+    response = {
+        'success': True,
+        'detection_count': len(detections),
+        'cached': cached,
+        'processing_time': f"{diff:.2f} ms"
+    }
+    if include_image:
+        img_with_markers = draw_anomaly_markers(pil_image, results)
+        if img_with_markers is None:
+            img_with_markers = pil_image
+        img_buffer = io.BytesIO()
+        img_with_markers.save(img_buffer, format="PNG")
+        response['result_image'] = base64.b64encode(img_buffer.getvalue()).decode("utf-8")
+    if tiles is not None:
+        response['tiles'] = tiles  # [{"box": [x1, y1, x2, y2], "ms": inference time, "count": detections}]
+        response['tile_count'] = len(tiles)
+
+    row = {
+        'anomalies': len(detections),
+        'max_score': max((d.get("score", 0) for d in detections), default=0),
+    }
+    return response, row
+
 def on_detect_anomalies(client_id, data):
-    """Callback function to handle anomaly detection requests."""
+    """Callback function to handle anomaly detection requests.
+
+    With `tiled: true` the image is inspected tile by tile (see tiling.detect_tiled) and the
+    response also lists every tile with its inference time.
+    """
     try:
         image_data = data.get('image')
         if not image_data:
             ui.send_message('detection_error', {'error': 'No image data'})
             return
 
-        image_bytes = base64.b64decode(image_data)
-        pil_image = Image.open(io.BytesIO(image_bytes))
+        response, _ = analyze_image(base64.b64decode(image_data), tiled=bool(data.get('tiled')))
+        ui.send_message('detection_result', response)
+
+    except Exception as e:
+        ui.send_message('detection_error', {'error': str(e)})
+
+def start_batch(path: str, tiled: bool = False, include_images: bool = False, room=None) -> BatchJob:
+    """Start inspecting every image of a directory or ZIP archive, given by its path relative to BATCH_INPUT_DIR.
 
-        start_time = time.time() * 1000
-        results = anomaly_detection.detect(pil_image)
-        diff = time.time() * 1000 - start_time
+    Each image produces a `detection_result` message with `batch_id`, `name` and `progress` fields,
+    the result image is only included with `include_images`. A `batch_done` message follows the last one.
+    """
+    # Clients may only point at the App's batch folder, never at arbitrary locations of the board
+    root = BATCH_INPUT_DIR.resolve()
+    source = (root / path).resolve()
+    if not source.is_relative_to(root):
+        raise ValueError(f"The batch path must be inside {BATCH_INPUT_DIR.name}/")
+    job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:4]}"
 
-        if results is None:
-            ui.send_message('detection_error', {'error': 'No results returned'})
-            return
+    def on_result(job, name, event):
+        status = job.status()
+        event = dict(event, batch_id=job.job_id, name=name, progress={'done': status['done'], 'total': status['total']})
+        ui.send_message('detection_result', event, room=room)
 
-        img_with_markers = draw_anomaly_markers(pil_image, results)
+    def on_done(job):
+        ui.send_message('batch_done', dict(job.status(),
+                                           summary_csv=f"/batch/{job.job_id}/summary/csv",
+                                           summary_json=f"/batch/{job.job_id}/summary/json"), room=room)
 
-        if img_with_markers is not None:
-            img_buffer = io.BytesIO()
-            img_with_markers.save(img_buffer, format="PNG")
-            img_buffer.seek(0)
-            b64_result = base64.b64encode(img_buffer.getvalue()).decode("utf-8")
-        else:
-            img_buffer = io.BytesIO()
-            pil_image.save(img_buffer, format="PNG")
-            img_buffer.seek(0)
-            b64_result = base64.b64encode(img_buffer.getvalue()).decode("utf-8")
-
-        response = {
-            'success': True,
-            'result_image': b64_result,
-            'detection_count': len(results) if results else 0,
-            'processing_time': f"{diff:.2f} ms"
-        }
-        ui.send_message('detection_result', response)
+    job = BatchJob(job_id, source, lambda image_bytes: analyze_image(image_bytes, tiled, include_images),
+                   on_result, on_done, output_dir=BATCH_OUTPUT_DIR, workers=BATCH_WORKERS)
+    batch_jobs[job_id] = job
+    job.start()
+    return job
 
+def on_start_batch(client_id, data):
+    try:
+        job = start_batch(data.get('path', ''), bool(data.get('tiled')), bool(data.get('include_images')), room=client_id)
+        ui.send_message('batch_started', job.status(), room=client_id)
     except Exception as e:
-        ui.send_message('detection_error', {'error': str(e)})
+        ui.send_message('detection_error', {'error': f"Cannot start batch: {e}"}, room=client_id)
+
+def on_cancel_batch(client_id, data):
+    job = batch_jobs.get(data.get('job_id'))
+    if job:
+        job.cancel()
+
+def on_post_batch(path: str, tiled: bool = False, include_images: bool = False):
+    try:
+        return start_batch(path, tiled, include_images).status()
+    except Exception as e:
+        return Response(content=f"Cannot start batch: {e}", status_code=400)
+
+def on_get_batch(job_id: str):
+    job = batch_jobs.get(job_id)
+    if job is None:
+        return Response(content="Unknown batch", status_code=404)
+    return job.status()
+
+def on_get_batch_summary(job_id: str, fmt: str):
+    job = batch_jobs.get(job_id)
+    if job is None or fmt not in ("csv", "json"):
+        return Response(content="Unknown batch or format", status_code=404)
+    path = job.summary_path(fmt)
+    if not path.exists():
+        return Response(content="Batch still running", status_code=409)
+    return Response(content=path.read_bytes(), media_type="text/csv" if fmt == "csv" else "application/json")
 
 ui = WebUI()
 ui.on_message('detect_anomalies', on_detect_anomalies)
+ui.on_message('start_batch', on_start_batch)
+ui.on_message('cancel_batch', on_cancel_batch)
+ui.expose_api("POST", "/batch", on_post_batch)
+ui.expose_api("GET", "/batch/{job_id}", on_get_batch)
+ui.expose_api("GET", "/batch/{job_id}/summary/{fmt}", on_get_batch_summary)
 
 App.run()
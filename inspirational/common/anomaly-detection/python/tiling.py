@@ -0,0 +1,85 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import time
+from concurrent.futures import Executor
+
+
+def make_tiles(width: int, height: int, tile_size: int, overlap: int) -> list[tuple[int, int, int, int]]:
+    """Split an image into overlapping (x1, y1, x2, y2) tiles covering it entirely.
+
+    Tiles are at most `tile_size` wide and high and overlap their neighbours by at
+    least `overlap` pixels, so a defect on a tile border is fully inside another tile.
+    """
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        stride = tile_size - overlap
+        count = -(-(length - overlap) // stride)  # ceil
+        # Spread the tiles evenly, so the last one ends exactly on the image border
+        return [round(i * (length - tile_size) / (count - 1)) for i in range(count)]
+
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in starts(height) for x in starts(width)]
+
+
+def detect_tiled(pil_image, detect, executor: Executor, tile_size: int = 512, overlap: int = 64,
+                 iou_threshold: float = 0.3) -> tuple[dict, list[dict]]:
+    """Run `detect(tile_image)` on every tile and merge the detections in full-image coordinates.
+
+    Args:
+        pil_image: image to inspect
+        detect (callable): model call returning {"detection": [...]} with `bounding_box_xyxy`
+            in tile coordinates
+        executor: pool the tiles are processed on
+        tile_size (int): tile side in pixels
+        overlap (int): minimum overlap between neighbouring tiles in pixels
+        iou_threshold (float): overlap above which two detections are the same defect
+
+    Returns:
+        tuple: (merged results, per tile {"box", "ms", "count"})
+    """
+    tiles = make_tiles(pil_image.width, pil_image.height, tile_size, overlap)
+
+    def run(box):
+        start = time.perf_counter()
+        results = detect(pil_image.crop(box))
+        return results, (time.perf_counter() - start) * 1000
+
+    detections = []
+    tile_stats = []
+    for box, (results, ms) in zip(tiles, executor.map(run, tiles), strict=True):
+        found = (results or {}).get("detection", [])
+        x0, y0 = box[0], box[1]
+        for detection in found:
+            x1, y1, x2, y2 = detection["bounding_box_xyxy"]
+            detections.append(dict(detection, bounding_box_xyxy=[x1 + x0, y1 + y0, x2 + x0, y2 + y0]))
+        tile_stats.append({"box": list(box), "ms": round(ms, 2), "count": len(found)})
+
+    return {"detection": merge_detections(detections, iou_threshold)}, tile_stats
+
+
+def merge_detections(detections: list[dict], iou_threshold: float = 0.3) -> list[dict]:
+    """Greedy de-duplication of detections found by overlapping tiles, keeping the highest score.
+
+    Two detections are duplicates if their IoU exceeds `iou_threshold`, or if one lies
+    mostly inside the other (a defect cut by a tile border next to the full one).
+    """
+    kept = []
+    for detection in sorted(detections, key=lambda d: d.get("score", 0), reverse=True):
+        box = detection["bounding_box_xyxy"]
+        if all(not _same(box, other["bounding_box_xyxy"], iou_threshold) for other in kept):
+            kept.append(detection)
+    return kept
+
+
+def _same(a, b, iou_threshold: float) -> bool:
+    iw = min(a[2], b[2]) - max(a[0], b[0])
+    ih = min(a[3], b[3]) - max(a[1], b[1])
+    if iw <= 0 or ih <= 0:
+        return False
+    inter = iw * ih
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / (area_a + area_b - inter) > iou_threshold or inter / min(area_a, area_b) > 0.8
@@ -15,6 +15,7 @@ const scanMessageElement = document.getElementById('scanMessage');
 const rescanButtonContainer = document.getElementById('rescan-button-container');
 const deleteScanElement = document.getElementById('delete-scan');
 let errorContainer = document.getElementById('error-container');
+const continuousToggle = document.getElementById('continuousToggle');
 
 const MAX_RECENT_SCANS = 5;
 let scans = [];
@@ -44,7 +45,9 @@ function onUIDisconnected() {
   }
 }
 async function handleCodeDetected(message) {
-  updateCameraStatus('hide'); // Hide camera status when code is detected
+  if (!continuousToggle.checked) {
+    updateCameraStatus('hide'); // Hide camera status when code is detected
+  }
   renderScanInfo(message);
   addScan(message);
   renderScans();
@@ -53,7 +56,9 @@ async function handleCodeDetected(message) {
 
 async function handleFrameDetected(message) {
   updateCameraStatus('show');
-  scanInfoElement.innerHTML = ``; // Clear the scan info display
+  if (!continuousToggle.checked) {
+    scanInfoElement.innerHTML = ``; // Clear the scan info display
+  }
   rescanButtonContainer.style.display = 'none'; // Hide the "Scan another" button while scanning
   await renderFrameImage(message.image, message.image_type);
 }
@@ -80,6 +85,15 @@ function updateCameraStatus(action = 'show') {
 // Start the application
 listScans();
 ui.send_message('reset_detection'); // Notify the server to reset detection
+continuousToggle.addEventListener('change', () => {
+  // In continuous mode the board keeps scanning and reports every new code, once per cool-down
+  ui.send_message('set_scan_mode', { continuous: continuousToggle.checked });
+});
+
+function rescan() {
+  rescanButtonContainer.style.display = 'none';
+  ui.send_message('reset_detection');
+}
 attachIconClickHandlers(); // Attach event listeners for icon clicks
 
 // Function to copy text to clipboard and show tooltip feedback
@@ -199,8 +213,8 @@ function renderScanInfo(message) {
         </div>
     `;
 
-  // Show the "Scan another" button when a code is detected
-  rescanButtonContainer.style.display = 'flex';
+  // Show the "Scan another" button when a code is detected, continuous mode does not need it
+  rescanButtonContainer.style.display = continuousToggle.checked ? 'none' : 'flex';
 }
 
 function getContentHeaderForType(type) {
@@ -276,7 +290,7 @@ async function renderLatestScanImage() {
   }
 
   try {
-    const image = base64ToUint8Array(scans[0].image);
+    const image = typeof scans[0].image === 'string' ? base64ToUint8Array(scans[0].image) : scans[0].image;
     const blob = new Blob([image], { type: scans[0].image_type });
 
     // Clean up the previous ImageBitmap to free memory
@@ -303,7 +317,8 @@ async function renderLatestScanImage() {
 // Function to render a frame image
 async function renderFrameImage(image, image_type) {
   try {
-    const imageBytes = base64ToUint8Array(image);
+    // Preview frames arrive as binary data, no base64 decoding needed
+    const imageBytes = typeof image === 'string' ? base64ToUint8Array(image) : image;
     const blob = new Blob([imageBytes], { type: image_type });
 
     // Clean up the previous ImageBitmap to free memory
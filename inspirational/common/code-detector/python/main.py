@@ -4,81 +4,137 @@
 
 from datetime import datetime, UTC
 import io
-import base64
 from PIL.Image import Image
+from fastapi.responses import Response
 from arduino.app_utils import App
 from arduino.app_bricks.web_ui import WebUI
 from arduino.app_bricks.camera_code_detection import CameraCodeDetection, Detection, draw_bounding_box
-from arduino.app_bricks.dbstorage_sqlstore import SQLStore
+from preview import PreviewEncoder
+from tracking import ExpiringSet, BatchWriter
+import scans
+
+# Live preview sent to the browser: frames are scaled down to fit PREVIEW_SIZE (None keeps the camera resolution)
+PREVIEW_SIZE = (640, 480)
+PREVIEW_QUALITY = 70
+# JPEG quality of the annotated frame saved with each scan
+SCAN_IMAGE_QUALITY = 90
+# Continuous mode keeps scanning after a code is found, reporting each code content
+# at most once every COOLDOWN_SECONDS. It can be switched on from the web page too.
+CONTINUOUS_MODE = False
+COOLDOWN_SECONDS = 10.0
+# Scans are written to the log in batches of up to SCAN_BATCH_SIZE, at most SCAN_BATCH_DELAY seconds late
+SCAN_BATCH_SIZE = 20
+SCAN_BATCH_DELAY = 1.0
 
 detected = False
+continuous = CONTINUOUS_MODE
+recent_codes = ExpiringSet(COOLDOWN_SECONDS)
 
-def on_code_detected(frame: Image, detection: Detection):
-    """Callback function that handles a detected code."""
+def on_codes_detected(frame: Image, detections: list[Detection]):
+    """Callback function that handles all the codes detected in a frame at once."""
     global detected
     if detected:
         # If a code has already been detected, ignore further detections
         return
 
-    frame = draw_bounding_box(frame, detection)
+    if continuous:
+        # Only codes not reported during the cool-down window
+        detections = [d for d in detections if recent_codes.add((d.type, d.content))]
+    if not detections:
+        return
+
+    for detection in detections:
+        frame = draw_bounding_box(frame, detection)
 
+    # The frame is encoded once, for all the codes it contains
     buffer = io.BytesIO()
-    frame.save(buffer, format="JPEG", quality=100)
-    b64_frame = base64.b64encode(buffer.getvalue()).decode("utf-8")
-
-    entry = {
-        "content": detection.content,
-        "type": detection.type,
-        "timestamp": datetime.now(UTC).isoformat(),
-        "image": b64_frame,
-        "image_type": "image/jpeg",
-    }
-    store.store("scan_log", entry)
-    ui.send_message('code_detected', entry)
-    detected = True
+    frame.save(buffer, format="JPEG", quality=SCAN_IMAGE_QUALITY)
+    image = buffer.getvalue()
+
+    timestamp = datetime.now(UTC).isoformat()
+    for detection in detections:
+        entry = {
+            "content": detection.content,
+            "type": detection.type,
+            "timestamp": timestamp,
+            "image": image,  # raw bytes, sent as a binary Socket.IO attachment
+            "image_type": "image/jpeg",
+        }
+        scan_writer.put(entry)
+        ui.send_message('code_detected', entry)
+
+    if not continuous:
+        detected = True
 
 def on_frame(frame: Image):
-    """Callback function that processes each frame from the camera."""
+    """Callback function that processes each frame from the camera.
+
+    Encoding is left to the preview worker, so the detector thread moves on immediately.
+    """
     global detected
     if detected:
         # If a code has already been detected, ignore further detections
         return
 
-    buffer = io.BytesIO()
-    frame.save(buffer, format="JPEG", quality=100)
-    b64_frame = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    preview.submit(frame)
+
+def on_list_scans(limit: int = 5):
+    """Callback function that lists the latest scanned codes (5 by default), without their images."""
+    return {"scans": scans.list_scans(limit)}
 
-    entry = {
-        "timestamp": datetime.now(UTC).isoformat(),
-        "image": b64_frame,
-        "image_type": "image/jpeg",
-    }
+def on_get_scan_image(scan_id: int):
+    """Callback function that returns the annotated frame of a scan."""
+    return _image_response(scans.get_image(scan_id))
 
-    ui.send_message('frame_detected', entry)
+def on_get_scan_thumbnail(scan_id: int):
+    """Callback function that returns the thumbnail of a scan."""
+    return _image_response(scans.get_image(scan_id, thumbnail=True))
 
-def on_list_scans():
-    """Callback function that lists the latest 5 scanned codes."""
-    scans = store.read("scan_log", order_by="timestamp DESC", limit=5)
-    return {"scans": scans if scans else []}
+def _image_response(image: bytes | None):
+    if image is None:
+        return Response(content="Scan not found", status_code=404)
+    # Scan images never change once stored
+    return Response(content=image, media_type="image/jpeg", headers={"Cache-Control": "max-age=31536000, immutable"})
 
 def reset_detection(_, __):
     """Callback function to reset the detection state."""
     global detected
     detected = False
+    recent_codes.clear()
+
+def set_scan_mode(_, data):
+    """Callback function to switch continuous mode on or off and to set its cool-down."""
+    global continuous, detected
+    data = data if isinstance(data, dict) else {}
+    continuous = bool(data.get("continuous"))
+    try:
+        cooldown = float(data.get("cooldown") or 0)
+    except (TypeError, ValueError):
+        cooldown = 0.0
+    # A cool-down that is not a positive number keeps the current one
+    if 0 < cooldown < float("inf"):
+        recent_codes.ttl = cooldown
+    recent_codes.clear()
+    detected = False
 
 def on_error(e: Exception):
     """Callback function that handles exceptions from the detector."""
     ui.send_message('error', str(e))
 
-store = SQLStore("code-scanner.db")
+scans.init_db()
+scan_writer = BatchWriter(scans.save_scans, batch_size=SCAN_BATCH_SIZE, max_delay=SCAN_BATCH_DELAY)
 
 detector = CameraCodeDetection()  # This also initializes the camera
-detector.on_detect(on_code_detected)
+detector.on_detect(on_codes_detected)
 detector.on_frame(on_frame)
 detector.on_error(on_error)
 
 ui = WebUI()
+preview = PreviewEncoder(ui, 'frame_detected', max_size=PREVIEW_SIZE, quality=PREVIEW_QUALITY)
 ui.expose_api('GET', '/list_scans', on_list_scans)
+ui.expose_api('GET', '/scan_image/{scan_id}', on_get_scan_image)
+ui.expose_api('GET', '/scan_thumbnail/{scan_id}', on_get_scan_thumbnail)
 ui.on_message('reset_detection', reset_detection)
+ui.on_message('set_scan_mode', set_scan_mode)
 
 App.run()
@@ -0,0 +1,68 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import io
+import threading
+from datetime import datetime, UTC
+from PIL import Image
+
+
+class PreviewEncoder:
+    """Encodes camera frames to JPEG on its own thread and sends them to the Web UI.
+
+    Only the latest frame is kept: a frame arriving while the previous one is being
+    encoded replaces the waiting one, so the camera thread never waits and a slow
+    encoder drops frames instead of falling behind.
+
+    Args:
+        ui: WebUI used to send the frames
+        message_type (str): message the frames are sent with
+        max_size (tuple): frames are scaled down to fit in (width, height), None to keep them as they are
+        quality (int): JPEG quality, 1-95
+    """
+    def __init__(self, ui, message_type: str = 'frame_detected', max_size: tuple[int, int] | None = (640, 480),
+                 quality: int = 70):
+        self.ui = ui
+        self.message_type = message_type
+        self.max_size = max_size
+        self.quality = quality
+        self.sent = 0
+        self.dropped = 0
+        self._frame = None
+        self._cond = threading.Condition()
+        threading.Thread(target=self._run, name="preview-encoder", daemon=True).start()
+
+    def submit(self, frame: Image.Image):
+        """Hand over a frame to the encoder, never blocks."""
+        with self._cond:
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = frame
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._frame is None:
+                    self._cond.wait()
+                frame, self._frame = self._frame, None
+            try:
+                self.ui.send_message(self.message_type, {
+                    "timestamp": datetime.now(UTC).isoformat(),
+                    "image": self.encode(frame),  # raw bytes, sent as a binary Socket.IO attachment
+                    "image_type": "image/jpeg",
+                })
+                self.sent += 1
+            except Exception as e:
+                print(f"Preview encoding failed: {e}")
+
+    def encode(self, frame: Image.Image) -> bytes:
+        if self.max_size and (frame.width > self.max_size[0] or frame.height > self.max_size[1]):
+            frame = frame.copy()
+            frame.thumbnail(self.max_size, Image.Resampling.BILINEAR)
+        if frame.mode != "RGB":
+            frame = frame.convert("RGB")
+        buffer = io.BytesIO()
+        frame.save(buffer, format="JPEG", quality=self.quality)
+        return buffer.getvalue()
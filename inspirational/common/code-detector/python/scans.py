@@ -0,0 +1,144 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import base64
+import io
+from typing import Any
+from PIL import Image
+from arduino.app_bricks.dbstorage_sqlstore import SQLStore
+
+DB_NAME = "code-scanner.db"
+THUMBNAIL_SIZE = (160, 120)
+THUMBNAIL_QUALITY = 75
+
+# Scan metadata and images live in separate tables: listing the history only touches
+# the small `scans` rows, images are read one at a time when requested
+store = SQLStore(DB_NAME)
+
+
+def init_db():
+    """Start SQLStore, create the tables and move scans saved by older versions of the App."""
+    store.start()
+    store.create_table(
+        "scans",
+        {
+            "id": "INTEGER PRIMARY KEY",
+            "content": "TEXT",
+            "type": "TEXT",
+            "timestamp": "TEXT",  # ISO 8601, UTC
+            "image_type": "TEXT",
+        }
+    )
+    store.create_table(
+        "scan_images",
+        {
+            "scan_id": "INTEGER PRIMARY KEY",
+            "image": "BLOB",
+            "thumbnail": "BLOB",
+        }
+    )
+    store.execute_sql("CREATE INDEX IF NOT EXISTS idx_scans_timestamp ON scans (timestamp)")
+    migrate_legacy_log()
+
+
+def make_thumbnail(image: bytes) -> bytes:
+    with Image.open(io.BytesIO(image)) as img:
+        img.thumbnail(THUMBNAIL_SIZE)
+        buffer = io.BytesIO()
+        img.convert("RGB").save(buffer, format="JPEG", quality=THUMBNAIL_QUALITY)
+    return buffer.getvalue()
+
+
+def save_scan(content: str, code_type: str, timestamp: str, image: bytes, image_type: str = "image/jpeg",
+              thumbnail: bytes = None) -> int:
+    """Store a scan with its image and a thumbnail, generated here unless given.
+
+    Returns:
+        int: id of the new scan
+    """
+    return save_scans([{
+        "content": content,
+        "type": code_type,
+        "timestamp": timestamp,
+        "image": image,
+        "image_type": image_type,
+        "thumbnail": thumbnail,
+    }])[0]
+
+
+def save_scans(entries: list[dict]) -> list[int]:
+    """Store a batch of scans, as collected by tracking.BatchWriter, with one insert per table.
+
+    The ids are returned by the insert itself, so scans written concurrently by another
+    thread cannot get their images mixed up. Codes found in the same frame share its
+    image: its thumbnail is generated only once.
+
+    Returns:
+        list[int]: ids of the new scans, in the order of `entries`
+    """
+    if not entries:
+        return []
+    thumbnails = {}
+    for entry in entries:
+        image = entry["image"]
+        if entry.get("thumbnail") is None and id(image) not in thumbnails:
+            thumbnails[id(image)] = make_thumbnail(image)
+
+    rows = store.execute_sql(
+        "INSERT INTO scans (content, type, timestamp, image_type) VALUES "
+        + ", ".join(["(?, ?, ?, ?)"] * len(entries)) + " RETURNING id",
+        tuple(value for entry in entries for value in (entry["content"], entry["type"], entry["timestamp"],
+                                                         entry.get("image_type", "image/jpeg"))),
+    ) or []
+    # Ids are assigned in the order of the values, RETURNING does not guarantee that order
+    ids = sorted(row["id"] for row in rows)
+    if len(ids) != len(entries):
+        raise RuntimeError(f"Stored {len(ids)} of {len(entries)} scans")
+    store.execute_sql(
+        "INSERT INTO scan_images (scan_id, image, thumbnail) VALUES " + ", ".join(["(?, ?, ?)"] * len(entries)),
+        tuple(value for scan_id, entry in zip(ids, entries, strict=True)
+              for value in (scan_id, entry["image"], entry.get("thumbnail") or thumbnails[id(entry["image"])])),
+    )
+    return ids
+
+
+def list_scans(limit: int = 5) -> list[dict[str, Any]]:
+    """Latest scans first, as metadata with the URLs of their image and thumbnail."""
+    rows = store.read("scans", order_by="timestamp DESC", limit=int(limit)) or []
+    for row in rows:
+        row["image_url"] = f"/scan_image/{row['id']}"
+        row["thumbnail_url"] = f"/scan_thumbnail/{row['id']}"
+    return rows
+
+
+def get_image(scan_id: int, thumbnail: bool = False) -> bytes | None:
+    column = "thumbnail" if thumbnail else "image"
+    rows = store.execute_sql(f"SELECT {column} FROM scan_images WHERE scan_id = {int(scan_id)}") or []
+    return rows[0][column] if rows else None
+
+
+def migrate_legacy_log(batch_size: int = 50):
+    """Move the rows of the old `scan_log` table, with inline base64 images, to the new tables."""
+    legacy = store.execute_sql("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'scan_log'")
+    if not legacy:
+        return
+    last_rowid = 0
+    moved = 0
+    while True:
+        rows = store.execute_sql(
+            f"SELECT rowid AS rid, * FROM scan_log WHERE rowid > {last_rowid} ORDER BY rowid LIMIT {batch_size}"
+        ) or []
+        if not rows:
+            break
+        for row in rows:
+            last_rowid = row["rid"]
+            try:
+                image = base64.b64decode(row.get("image") or "")
+                save_scan(row.get("content"), row.get("type"), row.get("timestamp"), image,
+                          row.get("image_type") or "image/jpeg")
+                moved += 1
+            except Exception as e:
+                print(f"Skipping legacy scan {last_rowid}: {e}")
+    store.drop_table("scan_log")
+    print(f"Moved {moved} scans from the legacy scan_log table")
@@ -0,0 +1,72 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import queue
+import threading
+import time
+
+
+class ExpiringSet:
+    """Set of keys that are forgotten `ttl` seconds after they were added.
+
+    Used to report each code content once per cool-down window: expired keys are
+    purged lazily, so the set never grows past the codes seen in the last `ttl` seconds.
+    """
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._expiry = {}  # key -> monotonic expiry time
+        self._lock = threading.Lock()
+
+    def add(self, key, now: float = None) -> bool:
+        """Add a key, returning False if it is already in the set (i.e. seen within the last `ttl` seconds)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expiry = self._expiry.get(key)
+            if expiry is not None and expiry > now:
+                return False
+            self._expiry[key] = now + self.ttl
+            if len(self._expiry) > 64:
+                self._expiry = {k: t for k, t in self._expiry.items() if t > now}
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._expiry.clear()
+
+
+class BatchWriter:
+    """Collects items on a queue and hands them to `write(items)` in batches, from its own thread.
+
+    A batch is written when `batch_size` items are waiting or `max_delay` seconds after
+    its first item, so the detector thread never waits on the database.
+    """
+    def __init__(self, write, batch_size: int = 20, max_delay: float = 1.0, max_queue: int = 1000):
+        self.write = write
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue = queue.Queue(maxsize=max_queue)
+        threading.Thread(target=self._run, name="batch-writer", daemon=True).start()
+
+    def put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            print("Scan log writer is too far behind, scan dropped")
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self.write(batch)
+            except Exception as e:
+                print(f"Failed to write {len(batch)} scans: {e}")
@@ -6,25 +6,21 @@ const ui = new WebUI();
 ui.on_connect(onUIConnected);
 ui.on_disconnect(onUIDisconnected);
 
-// Temperature and Humidity live updates
-ui.on_message('temperature', message => {
-  renderChartData(temperatureLive, [message]);
-});
-
-ui.on_message('humidity', message => {
-  renderChartData(humidityLive, [message]);
-});
-
-ui.on_message('dew_point', message => {
-  renderChartData(dewPointLive, [message]);
-});
-
-ui.on_message('heat_index', message => {
-  renderChartData(heatIndexLive, [message]);
-});
-
-ui.on_message('absolute_humidity', message => {
-  renderChartData(absHumidityLive, [message]);
+// Live updates: one frame per reading carrying every measure.
+// Open the page with e.g. `?max_rate=0.2` to receive at most one (averaged) frame every 5 seconds.
+const maxRate = parseFloat(new URLSearchParams(window.location.search).get('max_rate'));
+
+ui.on_message('climate_sample', frame => {
+  const liveCharts = {
+    temperature: temperatureLive,
+    humidity: humidityLive,
+    dew_point: dewPointLive,
+    heat_index: heatIndexLive,
+    absolute_humidity: absHumidityLive,
+  };
+  for (const [measure, obj] of Object.entries(liveCharts)) {
+    if (frame[measure] !== undefined) renderChartData(obj, [{ ts: frame.ts, value: frame[measure] }]);
+  }
 });
 
 // Temperature and Humidity chart objects
@@ -55,6 +51,8 @@ const dewPoint1d = { canvas: null, chart: null, data: newChartData('blue', 'rgba
 const heatIndex1d = { canvas: null, chart: null, data: newChartData('red', 'rgba(255,0,0,0.08)'), unit: '°C' };
 const absHumidity1d = { canvas: null, chart: null, data: newChartData('purple', 'rgba(128,0,128,0.06)'), unit: 'g/m³' };
 
+const historicalMeasures = ['temperature', 'humidity', 'dew_point', 'heat_index', 'absolute_humidity'];
+
 let liveCircleTimeout = null;
 const noDataTimeout = 10000; // 10 seconds
 
@@ -95,28 +93,22 @@ document.querySelectorAll('.tab').forEach(tab => {
 });
 
 document.querySelector('.tab[data-tab="historical-1h"]').addEventListener('click', async () => {
-  const temperature_samples = await listSamples('temperature', '-1h', '5m');
-  renderChartData(temperature1h, temperature_samples, 12, true, false);
-  const humidity_samples = await listSamples('humidity', '-1h', '5m');
-  renderChartData(humidity1h, humidity_samples, 12, true, false);
-  const dew_samples = await listSamples('dew_point', '-1h', '5m');
-  renderChartData(dewPoint1h, dew_samples, 12, true, false);
-  const heat_samples = await listSamples('heat_index', '-1h', '5m');
-  renderChartData(heatIndex1h, heat_samples, 12, true, false);
-  const abs_samples = await listSamples('absolute_humidity', '-1h', '5m');
-  renderChartData(absHumidity1h, abs_samples, 12, true, false);
+  const samples = await listSamplesBatch(historicalMeasures, '-1h', '5m');
+  if (!samples) return;
+  renderChartData(temperature1h, samples.temperature, 12, true, false);
+  renderChartData(humidity1h, samples.humidity, 12, true, false);
+  renderChartData(dewPoint1h, samples.dew_point, 12, true, false);
+  renderChartData(heatIndex1h, samples.heat_index, 12, true, false);
+  renderChartData(absHumidity1h, samples.absolute_humidity, 12, true, false);
 });
 document.querySelector('.tab[data-tab="historical-1d"]').addEventListener('click', async () => {
-  const temperature_samples = await listSamples('temperature', '-1d', '1h');
-  renderChartData(temperature1d, temperature_samples, 24, false, false);
-  const humidity_samples = await listSamples('humidity', '-1d', '1h');
-  renderChartData(humidity1d, humidity_samples, 24, false, false);
-  const dew_samples = await listSamples('dew_point', '-1d', '1h');
-  renderChartData(dewPoint1d, dew_samples, 24, false, false);
-  const heat_samples = await listSamples('heat_index', '-1d', '1h');
-  renderChartData(heatIndex1d, heat_samples, 24, false, false);
-  const abs_samples = await listSamples('absolute_humidity', '-1d', '1h');
-  renderChartData(absHumidity1d, abs_samples, 24, false, false);
+  const samples = await listSamplesBatch(historicalMeasures, '-1d', '1h');
+  if (!samples) return;
+  renderChartData(temperature1d, samples.temperature, 24, false, false);
+  renderChartData(humidity1d, samples.humidity, 24, false, false);
+  renderChartData(dewPoint1d, samples.dew_point, 24, false, false);
+  renderChartData(heatIndex1d, samples.heat_index, 24, false, false);
+  renderChartData(absHumidity1d, samples.absolute_humidity, 24, false, false);
 });
 
 // Popover logic for Temperature and Humidity info buttons
@@ -186,6 +178,7 @@ document.querySelectorAll('.info-btn.abs').forEach(img => {
 });
 
 function onUIConnected() {
+  if (maxRate > 0) ui.send_message('climate_set_max_rate', { max_rate: maxRate });
   if (errorContainer) {
     errorContainer.style.display = 'none';
     errorContainer.textContent = '';
@@ -199,16 +192,28 @@ function onUIDisconnected() {
   }
 }
 
-async function listSamples(resource, start, aggr_window) {
+// Fetch several measures in one request. The response is columnar
+// ({ts: [...], values: {measure: [...]}}); it is expanded here into the
+// per-measure [{ts, value}] arrays that renderChartData expects.
+async function listSamplesBatch(resources, start, aggr_window) {
   try {
-    const response = await fetch(`http://${window.location.host}/get_samples/${resource}/${start}/${aggr_window}`);
+    const response = await fetch(
+      `http://${window.location.host}/get_samples_batch/${resources.join(',')}/${start}/${aggr_window}`
+    );
     if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
     const data = await response.json();
     if (data.error) {
       console.log(`Failed to get samples: ${data.error}`);
       return;
     }
-    return data;
+    const samples = {};
+    for (const [measure, values] of Object.entries(data.values)) {
+      samples[measure] = [];
+      values.forEach((value, i) => {
+        if (value !== null) samples[measure].push({ ts: data.ts[i], value: value });
+      });
+    }
+    return samples;
   } catch (error) {
     console.log(`Error fetching samples: ${error.message}`);
   }
@@ -0,0 +1,87 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import threading
+import time
+
+MESSAGE_TYPE = "climate_sample"
+
+
+class LiveFeed:
+    """Pushes one `climate_sample` frame per reading to the Web UI.
+
+    Every frame carries all measures of a reading under a single timestamp:
+    {"ts": ..., "temperature": ..., "humidity": ..., ...}. Clients may ask for a
+    maximum update rate; for those clients readings are averaged over the
+    interval and sent as a single frame once it elapses.
+    """
+
+    def __init__(self, ui):
+        self.ui = ui
+        self._lock = threading.Lock()
+        self._sids = set()
+        self._throttled = {}  # sid -> {"interval", "last_sent", "sums", "ts"}
+
+    def add_client(self, sid, data=None):
+        with self._lock:
+            self._sids.add(sid)
+
+    def remove_client(self, sid, data=None):
+        with self._lock:
+            self._sids.discard(sid)
+            self._throttled.pop(sid, None)
+
+    def set_max_rate(self, sid, data):
+        """Handle a client request such as {"max_rate": 1.0} (frames per second, 0 = unlimited)."""
+        try:
+            max_rate = float(data.get("max_rate", 0))
+        except (TypeError, ValueError, AttributeError):
+            max_rate = 0.0
+        with self._lock:
+            self._sids.add(sid)
+            if max_rate <= 0:
+                self._throttled.pop(sid, None)
+            else:
+                self._throttled[sid] = {"interval": 1.0 / max_rate, "last_sent": 0.0, "sums": {}, "ts": 0}
+
+    def publish(self, ts: int, values: dict):
+        """Send a reading to all clients, honoring each client's maximum rate.
+
+        Args:
+            ts (int): reading timestamp in milliseconds
+            values (dict): measure name -> value, None values are skipped
+        """
+        frame = {"ts": ts}
+        frame.update((k, v) for k, v in values.items() if v is not None)
+
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            if not self._throttled:
+                unthrottled = None
+            else:
+                unthrottled = [sid for sid in self._sids if sid not in self._throttled]
+                for sid, client in self._throttled.items():
+                    client["ts"] = ts
+                    # Measures can be missing from some readings: each is averaged over its own count
+                    sums = client["sums"]  # measure -> [sum, count]
+                    for k, v in frame.items():
+                        if k != "ts":
+                            acc = sums.setdefault(k, [0.0, 0])
+                            acc[0] += v
+                            acc[1] += 1
+                    if now - client["last_sent"] >= client["interval"]:
+                        aggregated = {"ts": ts}
+                        aggregated.update((k, total / count) for k, (total, count) in sums.items())
+                        due.append((sid, aggregated))
+                        client.update(last_sent=now, sums={})
+
+        if unthrottled is None:
+            # Common case: nobody asked for a lower rate, one broadcast serves everyone
+            self.ui.send_message(MESSAGE_TYPE, frame)
+            return
+        for sid in unthrottled:
+            self.ui.send_message(MESSAGE_TYPE, frame, room=sid)
+        for sid, aggregated in due:
+            self.ui.send_message(MESSAGE_TYPE, aggregated, room=sid)
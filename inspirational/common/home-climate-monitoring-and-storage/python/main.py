@@ -4,18 +4,55 @@
 
 import datetime
 import math
-from arduino.app_bricks.dbstorage_tsstore import TimeSeriesStore
 from arduino.app_bricks.web_ui import WebUI
 from arduino.app_utils import App, Bridge
+import store  # user module for cached and rolled-up sample storage
+from live import LiveFeed  # user module for compact realtime UI frames
+from retention import RetentionManager, RetentionPolicy  # user module for compaction of old samples
 
-db = TimeSeriesStore()
+# Raw samples are kept for 30 days, then compacted into the same 1m/1h/1d rollups
+# maintained by the store on ingest, and deleted in small background batches
+retention = RetentionManager(
+    store.db,
+    default=RetentionPolicy(raw_days=30, windows=tuple(store.ROLLUP_WINDOWS)),
+    policies={
+        # Derived metrics can be recomputed from temperature and humidity, keep less of them
+        "dew_point": RetentionPolicy(raw_days=7, windows=tuple(store.ROLLUP_WINDOWS)),
+        "heat_index": RetentionPolicy(raw_days=7, windows=tuple(store.ROLLUP_WINDOWS)),
+        "absolute_humidity": RetentionPolicy(raw_days=7, windows=tuple(store.ROLLUP_WINDOWS)),
+    },
+)
+retention.track(["temperature", "humidity"])
 
-def on_get_samples(resource: str, start: str, aggr_window: str):
-    samples = db.read_samples(measure=resource, start_from=start, aggr_window=aggr_window, aggr_func="mean", limit=100)
-    return [{"ts": s[1], "value": s[2]} for s in samples]
+# The rollup buckets being filled when the App last stopped are rebuilt from the raw samples
+store.restore_buckets(["temperature", "humidity", "dew_point", "heat_index", "absolute_humidity"])
+
+def on_get_samples(resource: str, start: str, aggr_window: str, aggr_func: str = "mean"):
+    if aggr_func not in store.ROLLUP_FUNCS:
+        return {"error": f"Unsupported aggregation function: {aggr_func}"}
+    return store.read_samples(resource, start, aggr_window, aggr_func)
+
+def on_get_samples_batch(resources: str, start: str, aggr_window: str, aggr_func: str = "mean"):
+    if aggr_func not in store.ROLLUP_FUNCS:
+        return {"error": f"Unsupported aggregation function: {aggr_func}"}
+    measures = [r for r in resources.split(",") if r]
+    if not measures:
+        return {"error": "No measures requested"}
+    return store.read_samples_columns(measures, start, aggr_window, aggr_func)
 
 ui = WebUI()
 ui.expose_api("GET", "/get_samples/{resource}/{start}/{aggr_window}", on_get_samples)
+ui.expose_api("GET", "/get_samples/{resource}/{start}/{aggr_window}/{aggr_func}", on_get_samples)
+ui.expose_api("GET", "/get_samples_batch/{resources}/{start}/{aggr_window}", on_get_samples_batch)
+ui.expose_api("GET", "/get_samples_batch/{resources}/{start}/{aggr_window}/{aggr_func}", on_get_samples_batch)
+
+live = LiveFeed(ui)
+ui.on_connect(live.add_client)
+ui.on_disconnect(live.remove_client)
+ui.on_message("climate_set_max_rate", live.set_max_rate)
+
+ui.expose_api("GET", "/retention_report", retention.report)
+retention.start()
 
 def record_sensor_samples(celsius: float, humidity: float):
     """Callback invoked by the board sketch via Bridge.notify to send sensor samples.
@@ -27,12 +64,8 @@ def record_sensor_samples(celsius: float, humidity: float):
 
     ts = int(datetime.datetime.now().timestamp() * 1000)
     # Write samples to time-series DB
-    db.write_sample("temperature", float(celsius), ts)
-    db.write_sample("humidity", float(humidity), ts)
-
-    # Push realtime updates to the UI
-    ui.send_message('temperature', {"value": float(celsius), "ts": ts})
-    ui.send_message('humidity', {"value": float(humidity), "ts": ts})
+    store.write_sample("temperature", float(celsius), ts)
+    store.write_sample("humidity", float(humidity), ts)
 
     # --- Derived metrics ---
     T = float(celsius)
@@ -64,16 +97,22 @@ def record_sensor_samples(celsius: float, humidity: float):
         absolute_humidity = es * (R / 100.0) * 2.1674 / (273.15 + T)
 
 
-    # Store and forward derived metrics if computed
+    # Store derived metrics if computed
     if dew_point is not None:
-        db.write_sample("dew_point", float(dew_point), ts)
-        ui.send_message('dew_point', {"value": float(dew_point), "ts": ts})
+        store.write_sample("dew_point", float(dew_point), ts)
     if heat_index is not None:
-        db.write_sample("heat_index", float(heat_index), ts)
-        ui.send_message('heat_index', {"value": float(heat_index), "ts": ts})
+        store.write_sample("heat_index", float(heat_index), ts)
     if absolute_humidity is not None:
-        db.write_sample("absolute_humidity", float(absolute_humidity), ts)
-        ui.send_message('absolute_humidity', {"value": float(absolute_humidity), "ts": ts})
+        store.write_sample("absolute_humidity", float(absolute_humidity), ts)
+
+    # Push the whole reading to the UI as a single realtime frame
+    live.publish(ts, {
+        "temperature": T,
+        "humidity": RH,
+        "dew_point": dew_point,
+        "heat_index": heat_index,
+        "absolute_humidity": absolute_humidity,
+    })
 
 print("Registering 'record_sensor_samples' callback.")
 Bridge.provide("record_sensor_samples", record_sensor_samples)
@@ -0,0 +1,264 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from arduino.app_bricks.dbstorage_tsstore import TimeSeriesStore
+
+# Rollup resolutions maintained on ingest, in milliseconds
+ROLLUP_WINDOWS = {"1m": 60_000, "1h": 3_600_000, "1d": 86_400_000}
+ROLLUP_FUNCS = ("mean", "min", "max")
+
+CACHE_TTL = 30.0  # seconds; relative starts like "-1h" slide, so entries must expire
+CACHE_MAX_ENTRIES = 256
+
+_WINDOW_UNITS = {"s": 1_000, "m": 60_000, "h": 3_600_000, "d": 86_400_000}
+EPOCH = "1970-01-01T00:00:00Z"
+RESTORE_LIMIT = 200_000  # raw samples read per bucket when restoring open buckets at start
+
+db = TimeSeriesStore()
+
+_pool = ThreadPoolExecutor(max_workers=5, thread_name_prefix="samples")
+_lock = threading.Lock()
+_cache = {}  # (measure, start, aggr_window, aggr_func) -> (expires_at, source_measure, samples, open_bucket)
+_rollup_starts = {}  # rollup measure -> ts of its first bucket written on ingest, see _older_raw
+_buckets = {}  # (measure, window) -> [bucket_start, count, sum, min, max]
+
+
+def rollup_measure(measure: str, window: str, func: str) -> str:
+    """Name of the measure holding the given rollup, e.g. 'temperature_1h_mean'."""
+    return f"{measure}_{window}_{func}"
+
+
+def window_ms(window: str) -> int | None:
+    """Convert an aggregation window such as '5m' or '1h' to milliseconds."""
+    try:
+        return int(window[:-1]) * _WINDOW_UNITS[window[-1]]
+    except (KeyError, ValueError, IndexError):
+        return None
+
+
+def write_sample(measure: str, value: float, ts: int):
+    """Store a raw sample and fold it into the rollups of its measure.
+
+    Args:
+        measure (str): measure name
+        value (float): sample value
+        ts (int): timestamp in milliseconds
+    """
+    db.write_sample(measure, value, ts)
+
+    closed = []
+    with _lock:
+        _invalidate(measure)
+        for window, size in ROLLUP_WINDOWS.items():
+            start = ts - ts % size
+            bucket = _buckets.get((measure, window))
+            if bucket is not None and bucket[0] != start:
+                closed.append((window, bucket))
+                bucket = None
+            if bucket is None:
+                _buckets[(measure, window)] = [start, 1, value, value, value]
+            else:
+                bucket[1] += 1
+                bucket[2] += value
+                bucket[3] = min(bucket[3], value)
+                bucket[4] = max(bucket[4], value)
+
+    # A bucket is written once, when the first sample of the next one arrives
+    for window, bucket in closed:
+        _write_rollup(measure, window, bucket)
+
+
+def restore_buckets(measures: list[str]):
+    """Rebuild the buckets being filled when the App stopped, call it before the first write_sample.
+
+    The open bucket of every window is refolded from the raw samples already stored, so
+    it is not written later with only the samples received after the restart. The bucket
+    before it is written from raw samples if its rollup is missing, i.e. the App stopped
+    while it was open.
+    """
+    now = int(time.time() * 1000)
+    for measure in measures:
+        for window, size in ROLLUP_WINDOWS.items():
+            start = now - now % size
+            try:
+                bucket = _fold(measure, start, now + 1)
+                if bucket is not None:
+                    with _lock:
+                        _buckets[(measure, window)] = bucket
+                previous = start - size
+                done = db.read_samples(measure=rollup_measure(measure, window, "mean"), start_from=_iso(previous),
+                                       end_to=_iso(start - 1), limit=1)
+                if not done:
+                    bucket = _fold(measure, previous, start)
+                    if bucket is not None:
+                        _write_rollup(measure, window, bucket)
+            except Exception as e:
+                print(f"Could not restore the {window} rollup of '{measure}': {e}")
+
+
+def read_samples(measure: str, start: str, aggr_window: str, aggr_func: str = "mean", limit: int = 100) -> list[dict]:
+    """Read aggregated samples, served from rollups and cached when possible.
+
+    The coarsest rollup whose window evenly divides `aggr_window` is used as the
+    source, so long ranges aggregate a few hundred precomputed points instead of
+    every raw sample. Falls back to the raw measure while no rollup is available, and
+    for the part of the range stored before the rollups were maintained on ingest.
+    Only the closed buckets are cached: when the rollup window is `aggr_window` itself,
+    the bucket still being filled is added to every result as it is read.
+
+    Args:
+        measure (str): measure name
+        start (str): start of the range, e.g. '-1h'
+        aggr_window (str): aggregation window, e.g. '5m'
+        aggr_func (str): one of 'mean', 'min' or 'max'
+
+    Returns:
+        list[dict]: samples as {"ts": ..., "value": ...}
+    """
+    key = (measure, start, aggr_window, aggr_func)
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(key)
+    if entry is not None and entry[0] > now:
+        return _with_open_bucket(measure, entry[2], entry[3], aggr_func)
+
+    samples = None
+    source = measure
+    open_bucket = None  # rollup window whose open bucket is added to the result
+    rollup = _pick_rollup(aggr_window) if aggr_func in ROLLUP_FUNCS else None
+    if rollup is not None:
+        source = rollup_measure(measure, rollup, aggr_func)
+        if rollup == aggr_window:
+            rows = db.read_samples(measure=source, start_from=start, limit=limit)
+        else:
+            rows = db.read_samples(
+                measure=source, start_from=start, aggr_window=aggr_window, aggr_func=aggr_func, limit=limit
+            )
+        if rows:
+            samples = [{"ts": _ts_ms(s[1]), "value": s[2]} for s in rows]
+            if rollup == aggr_window:
+                open_bucket = rollup
+            # Raw history stored before the rollups existed is not covered by them
+            older = _older_raw(measure, source, start, aggr_window, aggr_func, limit)
+            if older:
+                samples = sorted(older + samples, key=lambda s: s["ts"])[:limit]
+    if samples is None:
+        source = measure
+        rows = db.read_samples(measure=measure, start_from=start, aggr_window=aggr_window, aggr_func=aggr_func, limit=limit)
+        samples = [{"ts": _ts_ms(s[1]), "value": s[2]} for s in rows]
+
+    with _lock:
+        if len(_cache) >= CACHE_MAX_ENTRIES:
+            for k in [k for k, e in _cache.items() if e[0] <= now] or list(_cache):
+                del _cache[k]
+        _cache[key] = (now + CACHE_TTL, source, samples, open_bucket)
+    return _with_open_bucket(measure, samples, open_bucket, aggr_func)
+
+
+def read_samples_columns(measures: list[str], start: str, aggr_window: str, aggr_func: str = "mean",
+                         limit: int = 100) -> dict:
+    """Read several measures concurrently and merge them into a columnar layout.
+
+    Args:
+        measures (list[str]): measure names
+        start (str): start of the range, e.g. '-1h'
+        aggr_window (str): aggregation window, e.g. '5m'
+        aggr_func (str): one of 'mean', 'min' or 'max'
+
+    Returns:
+        dict: {"ts": [ms, ...], "values": {measure: [value or None, ...]}}, one
+            value array per measure aligned on the shared, sorted "ts" array
+    """
+    results = _pool.map(lambda m: read_samples(m, start, aggr_window, aggr_func, limit), measures)
+    series = {m: {_ts_ms(s["ts"]): s["value"] for s in samples} for m, samples in zip(measures, results, strict=True)}
+    ts = sorted(set().union(*series.values()))
+    return {"ts": ts, "values": {m: [points.get(t) for t in ts] for m, points in series.items()}}
+
+
+def _ts_ms(ts) -> int:
+    if isinstance(ts, str):
+        ts = datetime.datetime.fromisoformat(ts).timestamp() * 1000
+    elif isinstance(ts, datetime.datetime):
+        ts = ts.timestamp() * 1000
+    return int(ts)
+
+
+def _pick_rollup(aggr_window: str) -> str | None:
+    size = window_ms(aggr_window)
+    if size is None:
+        return None
+    candidates = [w for w, s in ROLLUP_WINDOWS.items() if s <= size and size % s == 0]
+    return max(candidates, key=ROLLUP_WINDOWS.get, default=None)
+
+
+def _with_open_bucket(measure: str, samples: list[dict], window: str | None, func: str) -> list[dict]:
+    """`samples` followed by the bucket of `window` still being filled, so exact-window reads include the latest data."""
+    if window is None:
+        return samples
+    with _lock:
+        bucket = _buckets.get((measure, window))
+        if bucket is None:
+            return samples
+        start, count, total, low, high = bucket
+    if samples and samples[-1]["ts"] >= start:
+        return samples
+    value = {"mean": total / count, "min": low, "max": high}[func]
+    return [*samples, {"ts": start, "value": value}]
+
+
+def _older_raw(measure: str, source: str, start: str, aggr_window: str, aggr_func: str, limit: int) -> list[dict]:
+    """Aggregated raw samples of the range stored before `source` was maintained on ingest.
+
+    Retention only writes rollups for the raw samples it deletes, so the raw samples
+    older than the first rollup following the oldest raw sample are not covered by any.
+    That rollup is looked up once: rollups are only added after it from then on.
+    """
+    first_ts = _rollup_starts.get(source)
+    if first_ts is None:
+        oldest = db.read_samples(measure=measure, start_from=EPOCH, limit=1)
+        if not oldest:
+            return []
+        first = db.read_samples(measure=source, start_from=_iso(_ts_ms(oldest[0][1])), limit=1)
+        if not first:
+            return []
+        first_ts = _rollup_starts[source] = _ts_ms(first[0][1])
+    size = window_ms(start[1:]) if start.startswith("-") else None
+    if size is not None and int(time.time() * 1000) - size >= first_ts:
+        return []
+    rows = db.read_samples(measure=measure, start_from=start, end_to=_iso(first_ts - 1),
+                           aggr_window=aggr_window, aggr_func=aggr_func, limit=limit)
+    return [{"ts": ts, "value": s[2]} for s in rows if (ts := _ts_ms(s[1])) < first_ts]
+
+
+def _fold(measure: str, start: int, end: int) -> list | None:
+    """Bucket [start, count, sum, min, max] of the raw samples in [start, end), None if there are none."""
+    # Timestamps are sent with second resolution: round the end up, the exact bounds are checked below
+    rows = db.read_samples(measure=measure, start_from=_iso(start), end_to=_iso(end + 999), limit=RESTORE_LIMIT)
+    values = [s[2] for s in rows if start <= _ts_ms(s[1]) < end]
+    if not values:
+        return None
+    return [start, len(values), sum(values), min(values), max(values)]
+
+
+def _write_rollup(measure: str, window: str, bucket: list):
+    start, count, total, low, high = bucket
+    for func, value in zip(ROLLUP_FUNCS, (total / count, low, high), strict=True):
+        name = rollup_measure(measure, window, func)
+        db.write_sample(name, value, start)
+        with _lock:
+            _invalidate(name)
+
+
+def _iso(ts_ms: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts_ms / 1000))
+
+
+def _invalidate(measure: str):
+    # Must be called with _lock held
+    for key in [k for k, e in _cache.items() if e[1] == measure]:
+        del _cache[key]
@@ -3,10 +3,14 @@
 // SPDX-License-Identifier: MPL-2.0
 
 let currentImage = null;
+let hasResult = false;
 let imageType = null;
 let imageInput;
 let errorContainer;
 
+// Only the best classes are requested from the board, keeping responses small for large label sets
+const TOP_K = 5;
+
 initializeElements();
 
 const ui = new WebUI();
@@ -77,7 +81,9 @@ function initializeElements() {
 
   // Confidence slider and input
   confidenceSlider.addEventListener('input', updateConfidenceDisplay);
+  confidenceSlider.addEventListener('input', scheduleRerun);
   confidenceInput.addEventListener('input', handleConfidenceInputChange);
+  confidenceInput.addEventListener('input', scheduleRerun);
   confidenceInput.addEventListener('blur', validateConfidenceInput);
   updateConfidenceDisplay();
 
@@ -107,6 +113,7 @@ function initializeElements() {
 
 function uploadNewImage() {
   currentImage = null;
+  hasResult = false;
   const imagePreview = document.getElementById('imagePreview');
   const resultsTable = document.getElementById('resultsTable');
 
@@ -208,6 +215,7 @@ function handleImageFile(file) {
   const reader = new FileReader();
   reader.onload = e => {
     currentImage = e.target.result.split(',')[1];
+    hasResult = false;
 
     const imagePreview = document.getElementById('imagePreview');
     imagePreview.innerHTML = `<img src="${e.target.result}" alt="Uploaded image" class="preview-image">`;
@@ -219,6 +227,17 @@ function handleImageFile(file) {
   reader.readAsDataURL(file);
 }
 
+// Once an image has been classified the board caches its results, so a new threshold is
+// applied without running the model again: refresh the result while the slider moves
+let rerunTimer = null;
+function scheduleRerun() {
+  if (!currentImage || !hasResult) {
+    return;
+  }
+  clearTimeout(rerunTimer);
+  rerunTimer = setTimeout(runClassification, 150);
+}
+
 function runClassification() {
   if (!currentImage) {
     showError('No image available for classification');
@@ -234,6 +253,7 @@ function runClassification() {
     image: currentImage,
     confidence: confidence,
     image_type: imageType,
+    top_k: TOP_K,
   });
 }
 
@@ -264,10 +284,16 @@ function handleClassificationResult(data) {
     table.appendChild(tbody);
     resultsTable.appendChild(table);
 
-    showStatus('Classification completed successfully!', 'success');
+    console.log('⏱️ Board timing:', data.timing);
+    const shown =
+      data.total_classes > data.results.classification.length
+        ? ` Showing the top ${data.results.classification.length} of ${data.total_classes} classes.`
+        : '';
+    showStatus(`Classification completed successfully!${shown}`, 'success');
   } else {
     showStatus('No objects detected with the current confidence threshold.', 'info');
   }
+  hasResult = true;
   setButtonState('completed');
 }
 
@@ -6,14 +6,43 @@ from arduino.app_utils import App
 from arduino.app_bricks.web_ui import WebUI
 from arduino.app_bricks.image_classification import ImageClassification
 from PIL import Image
+from cache import ResultCache, CACHE_MIN_CONFIDENCE, filter_by_confidence
 import io
 import base64
+import threading
 import time
 
+# Number of images whose results are kept, to re-apply a new confidence threshold without running the model
+CACHE_SIZE = 64
+# Synthetic image classified at startup to load the model before the first request
+WARMUP_IMAGE_SIZE = 224
+WARMUP_ATTEMPTS = 5
+
 image_classification = ImageClassification()
+cache = ResultCache(max_entries=CACHE_SIZE)
+
+def warm_up():
+    """Run the model once on a synthetic image, so the first user request does not pay for
+    loading and initializing it. Retries while the model is still starting."""
+    image = Image.new("RGB", (WARMUP_IMAGE_SIZE, WARMUP_IMAGE_SIZE), (128, 128, 128))
+    for attempt in range(WARMUP_ATTEMPTS):
+        start = time.perf_counter()
+        try:
+            image_classification.classify(image, image_type="jpeg", confidence=1.0)
+        except Exception as e:
+            print(f"Model warm-up attempt {attempt + 1} failed: {e}")
+            time.sleep(2)
+            continue
+        print(f"Model warmed up in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return
 
 def on_classify_image(client_id, data):
-    """Callback function to handle image classification requests."""
+    """Callback function to handle image classification requests.
+
+    Results are cached by image content, computed at a low threshold: the same image sent
+    again, with any threshold, is only filtered instead of running the model again.
+    With `top_k`, only the k classes with the highest confidence are sent back.
+    """
     try:
         image_data = data.get('image')
         image_type_raw = data.get('image_type')
@@ -22,25 +51,55 @@ def on_classify_image(client_id, data):
         else:
             image_type = 'jpeg'
         confidence = data.get('confidence', 0.25)
+        top_k = data.get('top_k')
         if not image_data:
             ui.send_message('classification_error', {'error': 'No image data'})
             return
 
+        timing = {}
+        start = time.perf_counter()
         image_bytes = base64.b64decode(image_data)
-        pil_image = Image.open(io.BytesIO(image_bytes))
+        key = ResultCache.key(image_bytes)
+        results = cache.get(key, confidence)
+        cached = results is not None
+        if not cached:
+            pil_image = Image.open(io.BytesIO(image_bytes))
+            pil_image.load()
+            decoded = time.perf_counter()
+            timing['decode_ms'] = round((decoded - start) * 1000, 2)
 
-        start_time = time.time() * 1000
-        results = image_classification.classify(pil_image, image_type=image_type, confidence=confidence)
-        diff = time.time() * 1000 - start_time
+            if pil_image.mode not in ("RGB", "L"):
+                pil_image = pil_image.convert("RGB")
+            preprocessed = time.perf_counter()
+            timing['preprocess_ms'] = round((preprocessed - decoded) * 1000, 2)
+
+            model_confidence = min(confidence, CACHE_MIN_CONFIDENCE)
+            results = image_classification.classify(pil_image, image_type=image_type, confidence=model_confidence)
+            timing['inference_ms'] = round((time.perf_counter() - preprocessed) * 1000, 2)
+            if results is not None:
+                cache.put(key, results, model_confidence)
 
         if results is None:
             ui.send_message('classification_error', {'error': 'No results returned'})
             return
 
+        postprocess_start = time.perf_counter()
+        results = filter_by_confidence(results, "classification", confidence)
+        total_classes = len(results["classification"])
+        if top_k:
+            results["classification"] = sorted(results["classification"], key=lambda c: c.get("confidence", 0),
+                                               reverse=True)[:int(top_k)]
+        end = time.perf_counter()
+        timing['postprocess_ms'] = round((end - postprocess_start) * 1000, 2)
+        timing['total_ms'] = round((end - start) * 1000, 2)
+
         response = {
             'success': True,
             'results': results,
-            'processing_time': f"{diff:.2f} ms"
+            'total_classes': total_classes,
+            'cached': cached,
+            'timing': timing,
+            'processing_time': f"{timing.get('inference_ms', 0.0):.2f} ms"
         }
         ui.send_message('classification_result', response)
 
@@ -50,4 +109,6 @@ def on_classify_image(client_id, data):
 ui = WebUI()
 ui.on_message('classify_image', on_classify_image)
 
+threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
 App.run()
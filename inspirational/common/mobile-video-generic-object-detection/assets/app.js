@@ -6,6 +6,9 @@ const recentDetectionsElement = document.getElementById('recentDetections');
 const feedbackContentElement = document.getElementById('feedback-content');
 const MAX_RECENT_SCANS = 5;
 let scans = [];
+// Detections arrive as tracker events, one message per frame. The board drops frames for this page while
+// it has not acknowledged the previous ones, ?max_rate=<fps> caps the rate further.
+const DETECTION_OPTIONS = { ack: true, max_rate: Number(new URLSearchParams(location.search).get('max_rate')) || 0 };
 const ui = new WebUI();
 let errorContainer = document.getElementById('error-container');
 
@@ -28,7 +31,7 @@ let webcamState = {
 // Start the application
 ui.on_connect(onUIConnected);
 ui.on_disconnect(onUIDisconnected);
-ui.on_message('detection', onDetection);
+ui.on_message('tracks', handleTracks);
 ui.on_message('welcome', onWelcome);
 ui.on_message('connected', onConnected);
 ui.on_message('disconnected', onDisconnected);
@@ -116,6 +119,7 @@ function onUIConnected() {
     errorContainer.style.display = 'none';
     errorContainer.textContent = '';
   }
+  ui.send_message('detections_options', DETECTION_OPTIONS);
 }
 
 function onUIDisconnected() {
@@ -125,10 +129,27 @@ function onUIDisconnected() {
   }
 }
 
-async function onDetection(message) {
-  printDetection(message);
+// Tracked objects: 'enter' adds an entry to the recent detections, exits clear the feedback
+const activeTracks = new Map();
+
+function handleTracks(frame) {
+  let latest = null;
+  frame.events.forEach(([event, id, content, confidence]) => {
+    if (event === 'exit') {
+      activeTracks.delete(id);
+      return;
+    }
+    latest = { content, confidence, timestamp: frame.ts };
+    activeTracks.set(id, latest);
+    if (event === 'enter') {
+      printDetection(latest);
+    }
+  });
   renderDetections();
-  updateFeedback(message);
+  if (latest || activeTracks.size === 0) {
+    updateFeedback(latest);
+  }
+  ui.send_message('detections_ack');
 }
 
 async function onWelcome(message) {
@@ -0,0 +1,122 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import threading
+import time
+
+
+class DetectionFeed:
+    """Sends all the detections of a video frame to the Web UI as a single message.
+
+    Messages look like {"ts": epoch ms, "detections": [[label, confidence, box], ...]},
+    with `box` the [x1, y1, x2, y2] bounding box when the model reports it. The
+    timestamp is taken once per frame.
+
+    Clients can ask for a lower rate and for flow control with a `detections_options`
+    message ({"max_rate": fps, "ack": true}). With `ack`, the client confirms every
+    message it has processed with `detections_ack`, and frames are dropped for it while
+    `max_in_flight` messages are still unconfirmed, so a slow client falls behind
+    by dropping frames instead of queueing them. While no client uses either option,
+    each frame is broadcast with a single send.
+
+    Tracker events (see tracker.py) go through the same clients with `publish_events`,
+    as {"ts": epoch ms, "events": [[event, track_id, label, confidence, box], ...]}.
+
+    Args:
+        ui: WebUI used to send the messages
+        message_type (str): message the frames are sent with
+        events_message_type (str): message the tracker events are sent with
+        max_in_flight (int): unconfirmed messages allowed per client using `ack`
+    """
+    def __init__(self, ui, message_type: str = "detections", events_message_type: str = "tracks",
+                 max_in_flight: int = 2):
+        self.ui = ui
+        self.message_type = message_type
+        self.events_message_type = events_message_type
+        self.max_in_flight = max_in_flight
+        self.sent = 0
+        self.dropped = 0
+        self._clients = {}  # sid -> {"min_interval", "ack", "last_sent", "in_flight"}
+        self._controlled = False  # whether any client uses max_rate or ack
+        self._lock = threading.Lock()
+
+    def register(self, ui):
+        """Register the connection and option handlers on the WebUI."""
+        ui.on_connect(self.add_client)
+        ui.on_disconnect(self.remove_client)
+        self.register_messages(ui)
+
+    def register_messages(self, ui):
+        """Register only the option handlers, for Apps that have their own on_connect (call add_client from it)."""
+        ui.on_message("detections_options", self.set_options)
+        ui.on_message("detections_ack", self.ack)
+
+    def add_client(self, sid, data=None):
+        with self._lock:
+            self._clients[sid] = {"min_interval": 0.0, "ack": False, "last_sent": 0.0, "in_flight": 0}
+
+    def remove_client(self, sid, data=None):
+        with self._lock:
+            self._clients.pop(sid, None)
+            self._update_controlled()
+
+    def set_options(self, sid, options):
+        options = options or {}
+        max_rate = float(options.get("max_rate") or 0)
+        with self._lock:
+            client = self._clients.setdefault(sid, {"last_sent": 0.0, "in_flight": 0})
+            client["min_interval"] = 1.0 / max_rate if max_rate > 0 else 0.0
+            client["ack"] = bool(options.get("ack"))
+            client["in_flight"] = 0
+            self._update_controlled()
+
+    def ack(self, sid, data=None):
+        with self._lock:
+            client = self._clients.get(sid)
+            if client and client["in_flight"] > 0:
+                client["in_flight"] -= 1
+
+    def publish(self, detections: dict):
+        """Send the detections of a frame, as passed to the `on_detect_all` callback."""
+        rows = [[label, value.get("confidence"), value.get("bounding_box_xyxy")]
+                for label, values in detections.items() for value in values]
+        if rows:
+            self._send(self.message_type, {"ts": int(time.time() * 1000), "detections": rows})
+
+    def publish_events(self, events: list[list]):
+        """Send the events returned by the tracker.
+
+        Enter and exit events are never dropped: only a message made of update events alone
+        is subject to `max_rate` and `ack`.
+        """
+        if events:
+            self._send(self.events_message_type, {"ts": int(time.time() * 1000), "events": events},
+                       droppable=all(event[0] == "update" for event in events))
+
+    def _send(self, message_type: str, message: dict, droppable: bool = True):
+        with self._lock:
+            if not self._controlled:
+                targets = None
+            else:
+                now = time.monotonic()
+                targets = []
+                for sid, client in self._clients.items():
+                    if droppable and (now - client["last_sent"] < client["min_interval"]
+                                      or (client["ack"] and client["in_flight"] >= self.max_in_flight)):
+                        self.dropped += 1
+                        continue
+                    client["last_sent"] = now
+                    client["in_flight"] += client["ack"]
+                    targets.append(sid)
+
+        if targets is None:
+            self.ui.send_message(message_type, message)
+            self.sent += 1
+            return
+        for sid in targets:
+            self.ui.send_message(message_type, message, room=sid)
+        self.sent += len(targets)
+
+    def _update_controlled(self):
+        self._controlled = any(c["min_interval"] or c["ack"] for c in self._clients.values())
@@ -4,12 +4,16 @@
 
 import secrets
 import string
-from datetime import datetime, UTC
+import time
+from pathlib import Path
 
 from arduino.app_utils import App
 from arduino.app_bricks.web_ui import WebUI
 from arduino.app_bricks.video_objectdetection import VideoObjectDetection
 from arduino.app_peripherals.camera import WebSocketCamera
+from detection_feed import DetectionFeed
+from recorder import DetectionRecorder
+from tracker import IoUTracker
 
 
 def generate_secret() -> str:
@@ -25,20 +29,40 @@ camera.on_status_changed(lambda evt_type, data: ui.send_message(evt_type, data))
 
 detection = VideoObjectDetection(camera, confidence=0.5, debounce_sec=0.0)
 
-ui.on_connect(lambda sid: ui.send_message("welcome", {"client_name": camera.name, "secret": secret, "status": camera.status, "protocol": camera.protocol, "ip": camera.ip, "port": camera.port}))
+feed = DetectionFeed(ui)
+feed.register_messages(ui)
+
+def on_connect(sid):
+  ui.send_message("welcome", {"client_name": camera.name, "secret": secret, "status": camera.status, "protocol": camera.protocol, "ip": camera.ip, "port": camera.port})
+  feed.add_client(sid)
+
+ui.on_connect(on_connect)
+ui.on_disconnect(feed.remove_client)
 ui.on_message("override_th", lambda sid, threshold: detection.override_threshold(threshold))
 
-# Register a callback for when all objects are detected
-def send_detections_to_ui(detections: dict):
-  for key, values in detections.items():
-    for value in values:
-      entry = {
-        "content": key,
-        "confidence": value.get("confidence"),
-        "timestamp": datetime.now(UTC).isoformat()
-      }
-      ui.send_message("detection", entry)
+# Objects are tracked across frames: instead of every detection of every frame, the UI gets
+# enter, update (at most once a second per object) and exit events, see tracker.py
+tracker = IoUTracker(iou_threshold=0.3, max_age=1.0, update_interval=1.0)
+
+# Opt-in: record every frame's detections to CSV files in `recordings/`, with per-minute
+# rollups answering GET /detections/per_minute and GET /detections/seen, see recorder.py
+RECORD_DETECTIONS = False
+recorder = None
+if RECORD_DETECTIONS:
+  recorder = DetectionRecorder(Path(__file__).resolve().parent.parent / "recordings", retention_days=7)
+  ui.expose_api("GET", "/detections/per_minute", recorder.counts_per_minute)
+  ui.expose_api("GET", "/detections/seen", recorder.seen)
+
+def send_track_events(detections: dict):
+  if recorder:
+    recorder.record(detections)
+  feed.publish_events(tracker.update(detections))
+
+detection.on_detect_all(send_track_events)
 
-detection.on_detect_all(send_detections_to_ui)
+def loop():
+  # Objects that left the scene must exit even when no new frame is delivered
+  feed.publish_events(tracker.expire())
+  time.sleep(0.5)
 
-App.run()
+App.run(user_loop=loop)
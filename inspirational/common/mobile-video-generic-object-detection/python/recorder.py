@@ -0,0 +1,215 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import csv
+import datetime
+import queue
+import threading
+import time
+from pathlib import Path
+
+MINUTE_MS = 60_000
+RAW_FIELDS = ("ts", "label", "count", "max_confidence")
+MINUTE_FIELDS = ("minute", "label", "count", "frames", "max_confidence", "first_seen", "last_seen")
+
+_UNITS = {"s": 1_000, "m": 60_000, "h": 3_600_000, "d": 86_400_000}
+
+
+def parse_time(value, now: int) -> int:
+    """Epoch milliseconds from a relative time such as '-1h' or from epoch milliseconds."""
+    value = str(value).strip()
+    if value.startswith("-"):
+        try:
+            return now - int(value[1:-1]) * _UNITS[value[-1]]
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid relative time '{value}', expected e.g. '-30m', '-1h' or '-7d'") from None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid time '{value}', expected epoch milliseconds or e.g. '-1h'") from None
+
+
+class DetectionRecorder:
+    """Records the detections of every frame and keeps per-minute rollups to query them.
+
+    Each frame is summarized as one row per label (ts, label, count, max_confidence) and
+    appended to a daily CSV file by a background thread, in batches. The per-minute
+    rollups (count, frames, max confidence, first and last seen) are updated in memory as
+    frames arrive and each minute is appended to a daily rollup file once it is over,
+    so queries only read the rollups of the minutes in their window, never the raw rows.
+    The rollups of the last `retention_days` are loaded back at start, older files are deleted.
+
+    Args:
+        directory (Path): where the CSV files are written
+        retention_days (int): days of raw rows and rollups to keep
+        batch_size (int): rows appended per write at most
+        max_delay (float): seconds a row can wait before being written
+    """
+    def __init__(self, directory: Path, retention_days: int = 7, batch_size: int = 500, max_delay: float = 2.0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._minutes = {}  # minute start -> {label: [count, frames, max_confidence, first_seen, last_seen]}
+        self._open_minute = None
+        self._day = None
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=10_000)
+        self._load()
+        threading.Thread(target=self._writer, name="detection-recorder", daemon=True).start()
+
+    def record(self, detections: dict, ts: int = None):
+        """Add the detections of a frame, as passed to the `on_detect_all` callback. Never waits on the disk."""
+        ts = int(time.time() * 1000) if ts is None else ts
+        minute = ts - ts % MINUTE_MS
+        rows = []
+        with self._lock:
+            if self._open_minute is None or minute > self._open_minute:
+                self._close_minute()
+                self._open_minute = minute
+            buckets = self._minutes.setdefault(minute, {})
+            for label, values in detections.items():
+                if not values:
+                    continue
+                count = len(values)
+                confidence = max(value.get("confidence") or 0.0 for value in values)
+                bucket = buckets.get(label)
+                if bucket is None:
+                    buckets[label] = [count, 1, confidence, ts, ts]
+                else:
+                    bucket[0] += count
+                    bucket[1] += 1
+                    bucket[2] = max(bucket[2], confidence)
+                    bucket[3] = min(bucket[3], ts)
+                    bucket[4] = max(bucket[4], ts)
+                rows.append((ts, label, count, round(confidence, 4)))
+        if rows:
+            self._put(("raw", ts, rows))
+
+    def counts_per_minute(self, start: str = "-1h", end: str | None = None, label: str | None = None) -> dict:
+        """Detections per label per minute, as {"ts": [minute, ...], "counts": {label: [count, ...]}}."""
+        try:
+            minutes = self._window_minutes(start, end)
+        except ValueError as e:
+            return {"error": str(e)}
+        with self._lock:
+            buckets = [self._minutes.get(m, {}) for m in minutes]
+            labels = [label] if label else sorted({name for b in buckets for name in b})
+            counts = {name: [b[name][0] if name in b else 0 for b in buckets] for name in labels}
+        return {"ts": minutes, "counts": counts}
+
+    def seen(self, start: str = "-24h", end: str | None = None) -> dict:
+        """First and last time each label was seen in the window, with its detection and frame counts."""
+        try:
+            minutes = self._window_minutes(start, end)
+        except ValueError as e:
+            return {"error": str(e)}
+        labels = {}
+        with self._lock:
+            for minute in minutes:
+                for name, (count, frames, confidence, first, last) in self._minutes.get(minute, {}).items():
+                    entry = labels.get(name)
+                    if entry is None:
+                        labels[name] = {"first_seen": first, "last_seen": last, "count": count, "frames": frames,
+                                        "max_confidence": confidence}
+                    else:
+                        entry["first_seen"] = min(entry["first_seen"], first)
+                        entry["last_seen"] = max(entry["last_seen"], last)
+                        entry["count"] += count
+                        entry["frames"] += frames
+                        entry["max_confidence"] = max(entry["max_confidence"], confidence)
+        return {"start": minutes[0] if minutes else None, "end": minutes[-1] + MINUTE_MS if minutes else None,
+                "labels": labels}
+
+    def _window_minutes(self, start, end) -> list[int]:
+        """Start of the minutes overlapping the window, limited to the retained ones up to now."""
+        now = int(time.time() * 1000)
+        start_ms = max(parse_time(start, now), now - self.retention_days * 86_400_000)
+        end_ms = min(parse_time(end, now), now) if end else now
+        first = start_ms - start_ms % MINUTE_MS
+        return list(range(first, end_ms + 1, MINUTE_MS))
+
+    def _close_minute(self):
+        # Must be called with _lock held
+        minute = self._open_minute
+        if minute is None or not self._minutes.get(minute):
+            return
+        rows = [(minute, label, *bucket) for label, bucket in self._minutes[minute].items()]
+        self._put(("minutes", minute, rows))
+        day = minute // 86_400_000
+        if day != self._day:
+            self._day = day
+            oldest = minute - self.retention_days * 86_400_000
+            for old in [m for m in self._minutes if m < oldest]:
+                del self._minutes[old]
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            print("Detection recorder is too far behind, rows dropped")
+
+    def _writer(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while sum(len(rows) for _, _, rows in batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            files = {}
+            for kind, ts, rows in batch:
+                files.setdefault(self._path(kind, ts), []).extend(rows)
+            for path, rows in files.items():
+                try:
+                    self._append(path, RAW_FIELDS if path.name.startswith("raw") else MINUTE_FIELDS, rows)
+                except OSError as e:
+                    print(f"Failed to write {len(rows)} rows to {path}: {e}")
+            if any(kind == "minutes" for kind, _, _ in batch):
+                self._delete_old_files()
+
+    def _path(self, kind: str, ts: int) -> Path:
+        day = datetime.datetime.fromtimestamp(ts / 1000, datetime.UTC).date().isoformat()
+        return self.directory / f"{kind}-{day}.csv"
+
+    @staticmethod
+    def _append(path: Path, fields: tuple, rows: list):
+        new = not path.exists()
+        with open(path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if new:
+                writer.writerow(fields)
+            writer.writerows(rows)
+
+    def _delete_old_files(self):
+        oldest = (datetime.datetime.now(datetime.UTC).date() - datetime.timedelta(days=self.retention_days)).isoformat()
+        for path in self.directory.glob("*-*.csv"):
+            if path.stem.split("-", 1)[1] < oldest:
+                path.unlink(missing_ok=True)
+
+    def _load(self):
+        """Load the retained per-minute rollups, the minute in progress when the App stopped is not restored."""
+        self._delete_old_files()
+        for path in sorted(self.directory.glob("minutes-*.csv")):
+            try:
+                with open(path, newline="") as f:
+                    for row in csv.DictReader(f):
+                        buckets = self._minutes.setdefault(int(row["minute"]), {})
+                        loaded = [int(row["count"]), int(row["frames"]), float(row["max_confidence"]),
+                                  int(row["first_seen"]), int(row["last_seen"])]
+                        bucket = buckets.get(row["label"])
+                        if bucket is None:
+                            buckets[row["label"]] = loaded
+                        else:
+                            # The same minute written twice, by an App restarted within it
+                            buckets[row["label"]] = [bucket[0] + loaded[0], bucket[1] + loaded[1],
+                                                     max(bucket[2], loaded[2]), min(bucket[3], loaded[3]),
+                                                     max(bucket[4], loaded[4])]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Skipping detection rollups in {path}: {e}")
@@ -2,8 +2,15 @@
 //
 // SPDX-License-Identifier: MPL-2.0
 
-let currentImage = null;
-let resultImage = null;
+let currentImage = null; // File selected by the user, sent to the board as binary data
+let currentImageUrl = null;
+let resultImage = null; // Blob of the annotated result
+let resultImageUrl = null;
+let requestStart = 0;
+
+// By default the board only returns the detected boxes and the browser draws them over the
+// original image. Open the page with ?render=server to get the annotated image from the board instead.
+const renderMode = new URLSearchParams(window.location.search).get('render') === 'server' ? 'image' : 'boxes';
 let errorContainer;
 
 /*
@@ -82,7 +89,9 @@ function initializeElements() {
 
   // Confidence slider and input
   confidenceSlider.addEventListener('input', updateConfidenceDisplay);
+  confidenceSlider.addEventListener('input', scheduleRerun);
   confidenceInput.addEventListener('input', handleConfidenceInputChange);
+  confidenceInput.addEventListener('input', scheduleRerun);
   confidenceInput.addEventListener('blur', validateConfidenceInput);
   updateConfidenceDisplay();
 
@@ -115,7 +124,7 @@ function initializeElements() {
 // Upload new image function
 function uploadNewImage() {
   currentImage = null;
-  resultImage = null;
+  clearResultImage();
 
   // Reset image display
   resetImageDisplay();
@@ -270,18 +279,34 @@ function handleImageFile(file) {
     return;
   }
 
-  const reader = new FileReader();
-  reader.onload = e => {
-    currentImage = e.target.result.split(',')[1];
+  // The result of the previous image must not stay on screen while this one is analysed
+  clearResultImage();
 
-    const imagePreview = document.getElementById('imagePreview');
-    imagePreview.innerHTML = `<img src="${e.target.result}" alt="Uploaded image" class="preview-image">`;
-    imagePreview.style.border = 'none';
+  // Keep the File itself: it is read as an ArrayBuffer only when sent, and the
+  // preview is shown through an object URL instead of a base64 data URL
+  currentImage = file;
+  if (currentImageUrl) {
+    URL.revokeObjectURL(currentImageUrl);
+  }
+  currentImageUrl = URL.createObjectURL(file);
 
-    setButtonState('ready');
-    clearStatus();
-  };
-  reader.readAsDataURL(file);
+  const imagePreview = document.getElementById('imagePreview');
+  imagePreview.innerHTML = `<img src="${currentImageUrl}" alt="Uploaded image" class="preview-image">`;
+  imagePreview.style.border = 'none';
+
+  setButtonState('ready');
+  clearStatus();
+}
+
+// Once an image has been analysed the board caches its detections, so a new threshold is
+// applied without running the model again: refresh the result while the slider moves
+let rerunTimer = null;
+function scheduleRerun() {
+  if (!currentImage || !resultImage) {
+    return;
+  }
+  clearTimeout(rerunTimer);
+  rerunTimer = setTimeout(runDetection, 150);
 }
 
 function runDetection() {
@@ -291,7 +316,7 @@ function runDetection() {
   sendDetectionRequest();
 }
 
-function sendDetectionRequest() {
+async function sendDetectionRequest() {
   if (!currentImage) {
     showError('No image available for detection');
     setButtonState('ready');
@@ -300,9 +325,12 @@ function sendDetectionRequest() {
 
   const confidence = parseFloat(document.getElementById('confidenceSlider').value);
 
+  // Binary attachments are sent as is by Socket.IO, with no base64 encoding on either side
+  requestStart = performance.now();
   ui.send_message('detect_objects', {
-    image: currentImage,
+    image: await currentImage.arrayBuffer(),
     confidence: confidence,
+    mode: renderMode,
   });
 }
 
@@ -336,24 +364,108 @@ function displayImage(imageSrc, container) {
   }
 }
 
-function handleDetectionResult(data) {
+function setResultImage(blob) {
+  resultImage = blob;
+  if (resultImageUrl) {
+    URL.revokeObjectURL(resultImageUrl);
+  }
+  resultImageUrl = URL.createObjectURL(blob);
+
+  // Display the result image in the image container
+  displayImage(resultImageUrl, '.image-container');
+}
+
+function clearResultImage() {
+  clearTimeout(rerunTimer);
+  resultImage = null;
+  if (resultImageUrl) {
+    URL.revokeObjectURL(resultImageUrl);
+    resultImageUrl = null;
+  }
+  hideResultTitle();
+}
+
+function labelColor(label) {
+  let hash = 0;
+  for (const c of label) {
+    hash = (hash * 31 + c.charCodeAt(0)) | 0;
+  }
+  return `hsl(${Math.abs(hash) % 360}, 85%, 45%)`;
+}
+
+// Draw the detections over the original image. Boxes are normalized [x1, y1, x2, y2] in 0..1.
+function renderDetections(detections) {
+  return new Promise((resolve, reject) => {
+    const img = new Image();
+    img.onerror = reject;
+    img.onload = () => {
+      const canvas = document.createElement('canvas');
+      canvas.width = img.naturalWidth;
+      canvas.height = img.naturalHeight;
+      const ctx = canvas.getContext('2d');
+      ctx.drawImage(img, 0, 0);
+
+      const lineWidth = Math.max(2, Math.round(canvas.width / 300));
+      const fontSize = Math.max(12, Math.round(canvas.width / 50));
+      ctx.lineWidth = lineWidth;
+      ctx.font = `${fontSize}px sans-serif`;
+      ctx.textBaseline = 'top';
+      for (const detection of detections) {
+        const [x1, y1, x2, y2] = detection.box;
+        const x = x1 * canvas.width;
+        const y = y1 * canvas.height;
+        const color = labelColor(detection.label);
+        ctx.strokeStyle = color;
+        ctx.strokeRect(x, y, (x2 - x1) * canvas.width, (y2 - y1) * canvas.height);
+
+        const text = detection.confidence != null ? `${detection.label} ${detection.confidence}%` : detection.label;
+        const textWidth = ctx.measureText(text).width + 2 * lineWidth;
+        const textY = y >= fontSize + 2 * lineWidth ? y - fontSize - 2 * lineWidth : y;
+        ctx.fillStyle = color;
+        ctx.fillRect(x, textY, textWidth, fontSize + 2 * lineWidth);
+        ctx.fillStyle = 'white';
+        ctx.fillText(text, x + lineWidth, textY + lineWidth);
+      }
+      canvas.toBlob(blob => (blob ? resolve(blob) : reject(new Error('Canvas encoding failed'))), 'image/jpeg', 0.92);
+    };
+    img.src = currentImageUrl;
+  });
+}
+
+async function handleDetectionResult(data) {
   if (data.error) {
     showError(`Detection failed: ${data.error}`);
     setButtonState('ready');
     return;
   }
 
-  if (data.result_image) {
-    // Store the result image
-    resultImage = data.result_image;
+  const roundTrip = performance.now() - requestStart;
+  console.log(`⏱️ Round trip ${roundTrip.toFixed(1)} ms, board timing:`, data.timing);
 
-    // Display the result image in the image container
-    displayImage(`data:image/png;base64,${data.result_image}`, '.image-container');
+  if (data.mode === 'boxes' && data.detections) {
+    try {
+      setResultImage(await renderDetections(data.detections));
+    } catch (e) {
+      showError(`Could not draw the detections: ${e.message || e}`);
+      setButtonState('ready');
+      return;
+    }
+
+    showResultTitle();
+    showStatus(`Detection completed successfully! (${data.detection_count} objects, ${roundTrip.toFixed(0)} ms)`, 'success');
+  } else if (data.result_image) {
+    // Store the result image: binary JPEG, or base64 PNG from older versions of the App
+    const format = data.result_format || 'png';
+    const bytes =
+      typeof data.result_image === 'string'
+        ? Uint8Array.from(atob(data.result_image), c => c.charCodeAt(0))
+        : data.result_image;
+    setResultImage(new Blob([bytes], { type: `image/${format}` }));
 
     // Show result title and download button
     showResultTitle();
 
-    showStatus('Detection completed successfully!', 'success');
+    showStatus(`Detection completed successfully! (${data.detection_count} objects, ${roundTrip.toFixed(0)} ms)`, 'success');
   } else {
     showError('No result image received from detection');
     setButtonState('ready');
@@ -421,8 +533,8 @@ function downloadResult() {
 
   // Create download link
   const link = document.createElement('a');
-  link.href = `data:image/png;base64,${resultImage}`;
-  link.download = 'object-detection-result.png';
+  link.href = resultImageUrl;
+  link.download = `object-detection-result.${resultImage.type === 'image/jpeg' ? 'jpg' : 'png'}`;
 
   // Trigger download
   document.body.appendChild(link);
@@ -0,0 +1,70 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Model results report confidence in percent, while requests pass a 0..1 threshold
+CONFIDENCE_SCALE = 100
+# Cached results are computed at this threshold (or the request's, if lower), so they can be
+# filtered again for any higher threshold without running the model
+CACHE_MIN_CONFIDENCE = 0.05
+
+
+class ResultCache:
+    """LRU cache of model results, keyed by a hash of the image content.
+
+    Each entry remembers the confidence threshold it was computed with: it can
+    serve any request with that threshold or a higher one.
+
+    Args:
+        max_entries (int): number of images kept, least recently used are evicted first
+    """
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (results, confidence they were computed with)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(image_bytes: bytes) -> str:
+        return hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+
+    def get(self, key: str, confidence: float = 1.0):
+        """Return the results computed at a threshold <= `confidence`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] > confidence:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def contains(self, key: str, confidence: float = 1.0) -> bool:
+        """Like get, without updating the LRU order or the statistics."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] <= confidence
+
+    def put(self, key: str, results, confidence: float = 0.0):
+        with self._lock:
+            self._entries[key] = (results, confidence)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def filter_by_confidence(results: dict, list_key: str, confidence: float) -> dict:
+    """Copy of `results` keeping only the items of `results[list_key]` at or above `confidence` (0..1)."""
+    threshold = confidence * CONFIDENCE_SCALE
+    filtered = dict(results)
+    filtered[list_key] = [item for item in results.get(list_key, []) if item.get("confidence", 0) >= threshold]
+    return filtered
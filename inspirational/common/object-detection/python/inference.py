@@ -0,0 +1,73 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class QueueFull(Exception):
+    """Raised when a request cannot be queued because too many are already waiting."""
+
+
+class InferencePool:
+    """Runs inference jobs on a fixed number of worker threads, with a bounded queue.
+
+    Each client has at most one queued job: submitting a new one replaces the
+    queued one (latest wins), whose future is cancelled. A replaced job keeps
+    its place in the queue, so a client sending images quickly cannot starve
+    the others. Jobs already running are never interrupted.
+
+    Args:
+        workers (int): number of inference threads
+        max_pending (int): maximum number of queued (not yet running) jobs
+    """
+    def __init__(self, workers: int = 1, max_pending: int = 8):
+        self.max_pending = max_pending
+        self._pending = OrderedDict()  # client key -> (future, fn, enqueued at)
+        self._cond = threading.Condition()
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"inference-{i}", daemon=True).start()
+
+    def submit(self, key, fn) -> Future:
+        """Queue `fn(queue_wait_ms)` for the client `key` and return a Future of its result.
+
+        Raises:
+            QueueFull: if the queue is full and the client has no queued job to replace.
+        """
+        future = Future()
+        with self._cond:
+            previous = self._pending.get(key)
+            if previous is None and len(self._pending) >= self.max_pending:
+                raise QueueFull(f"{len(self._pending)} requests already queued")
+            self._pending[key] = (future, fn, time.perf_counter())
+            self._cond.notify()
+        if previous is not None:
+            previous[0].cancel()
+        return future
+
+    def cancel(self, key) -> bool:
+        """Drop the queued job of a client, e.g. when it disconnects."""
+        with self._cond:
+            job = self._pending.pop(key, None)
+        return job is not None and job[0].cancel()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                _, (future, fn, enqueued_at) = self._pending.popitem(last=False)
+            if not future.set_running_or_notify_cancel():
+                continue
+            queue_wait_ms = (time.perf_counter() - enqueued_at) * 1000
+            try:
+                future.set_result(fn(queue_wait_ms))
+            except Exception as e:
+                future.set_exception(e)
@@ -7,62 +7,223 @@
 from arduino.app_utils import *
 from arduino.app_bricks.web_ui import WebUI
 from arduino.app_bricks.object_detection import ObjectDetection
+from fastapi import Request
+from fastapi.responses import Response
 from PIL import Image
+from inference import InferencePool, QueueFull
+from cache import ResultCache, CACHE_MIN_CONFIDENCE, filter_by_confidence
+from concurrent.futures import Future
+import asyncio
 import io
 import base64
 import time
 
+# Quality of the annotated JPEG returned on the binary path (1-95, higher is bigger and slower to encode)
+JPEG_QUALITY = 80
+# Number of images processed in parallel, and how many requests can wait for a free worker
+INFERENCE_WORKERS = 1
+MAX_PENDING_REQUESTS = 8
+# Number of images whose detections are kept, to re-apply a new confidence threshold without running the model
+CACHE_SIZE = 64
+
 object_detection = ObjectDetection()
+pool = InferencePool(workers=INFERENCE_WORKERS, max_pending=MAX_PENDING_REQUESTS)
+cache = ResultCache(max_entries=CACHE_SIZE)
+
+def detect(image_bytes: bytes, confidence: float, key: str = None):
+    """Decode the image and run object detection on it.
+
+    Detections are cached by image content, computed at a low threshold: the same image
+    sent again, with any threshold, is only filtered instead of running the model again.
+
+    Returns:
+        tuple: (PIL image, detection results or None, timing dict in ms)
+    """
+    cpu_start = time.thread_time()
+    start = time.perf_counter()
+    pil_image = Image.open(io.BytesIO(image_bytes))
+    pil_image.load()
+    decoded = time.perf_counter()
+
+    key = key or ResultCache.key(image_bytes)
+    results = cache.get(key, confidence)
+    cached = results is not None
+    if not cached:
+        model_confidence = min(confidence, CACHE_MIN_CONFIDENCE)
+        results = object_detection.detect(pil_image, confidence=model_confidence)  # Perform object detection on the input image, keeping low confidence detections for the cache
+        if results is not None:
+            cache.put(key, results, model_confidence)
+    if results is not None:
+        results = filter_by_confidence(results, "detection", confidence)
+    done = time.perf_counter()
+
+    timing = {
+        'decode_ms': round((decoded - start) * 1000, 2),
+        'inference_ms': round((done - decoded) * 1000, 2),
+        'cached': cached,
+        'cpu_start': cpu_start,
+        'start': start,
+    }
+    return pil_image, results, timing
+
+def finish_timing(timing: dict) -> dict:
+    """Add total wall-clock and CPU time of the request to its timing dict."""
+    timing['total_ms'] = round((time.perf_counter() - timing.pop('start')) * 1000, 2)
+    timing['cpu_ms'] = round((time.thread_time() - timing.pop('cpu_start')) * 1000, 2)
+    return timing
+
+def annotate(pil_image, results, timing: dict, image_format: str, quality: int = JPEG_QUALITY) -> bytes:
+    """Draw the bounding boxes and encode the image as `image_format` ('JPEG' or 'PNG')."""
+    start = time.perf_counter()
+    img_with_boxes = object_detection.draw_bounding_boxes(pil_image, results) # Draw bounding boxes around the detected objects in the input image
+    if img_with_boxes is None:
+        img_with_boxes = pil_image
+    drawn = time.perf_counter()
+
+    img_buffer = io.BytesIO()
+    if image_format == "JPEG":
+        img_with_boxes.convert("RGB").save(img_buffer, format="JPEG", quality=max(1, min(int(quality), 95)))
+    else:
+        img_with_boxes.save(img_buffer, format="PNG")
+    timing['draw_ms'] = round((drawn - start) * 1000, 2)
+    timing['encode_ms'] = round((time.perf_counter() - drawn) * 1000, 2)
+    return img_buffer.getvalue()
+
+def to_boxes(pil_image, results) -> list[dict]:
+    """Detections with their box normalized to the image size, as [x1, y1, x2, y2] in 0..1."""
+    width, height = pil_image.size
+    boxes = []
+    for detection in results.get("detection", []):
+        x1, y1, x2, y2 = detection.get("bounding_box_xyxy", (0, 0, 0, 0))
+        boxes.append({
+            'label': detection.get("class_name", "unknown"),
+            'confidence': detection.get("confidence"),
+            'box': [round(x1 / width, 4), round(y1 / height, 4), round(x2 / width, 4), round(y2 / height, 4)],
+        })
+    return boxes
+
+def run_detection(image_bytes: bytes, confidence: float, mode: str, image_format: str, quality: int,
+                  queue_wait_ms: float, key: str = None) -> dict:
+    """Inference job run by the pool: returns the detection_result message."""
+    pil_image, results, timing = detect(image_bytes, confidence, key)
+    timing['queue_wait_ms'] = round(queue_wait_ms, 2)
+    if results is None:
+        raise RuntimeError('No results returned')
+
+    response = {
+        'success': True,
+        'detection_count': len(results.get("detection", [])),
+        'processing_time': f"{timing['inference_ms']:.2f} ms",
+    }
+    if mode == 'boxes':
+        response['mode'] = 'boxes'
+        response['detections'] = to_boxes(pil_image, results)
+    else:
+        response['mode'] = 'image'
+        response['result_image'] = annotate(pil_image, results, timing, image_format, quality)
+        response['result_format'] = image_format.lower()
+    response['timing'] = finish_timing(timing)
+    return response
+
+def send_detection_result(client_id, future, base64_result: bool):
+    if future.cancelled():
+        return  # superseded by a newer image from the same client, which gets its own answer
+    try:
+        response = future.result()
+    except Exception as e:
+        ui.send_message('detection_error', {'error': str(e)}, room=client_id)
+        return
+    if base64_result and 'result_image' in response:
+        response['result_image'] = base64.b64encode(response['result_image']).decode("utf-8")
+    ui.send_message('detection_result', response, room=client_id)
 
 # Define a callback function to handle object detection requests from the UI.
 def on_detect_objects(client_id, data):
-    """Callback function to handle object detection requests."""
+    """Callback function to handle object detection requests.
+
+    The image can be sent as binary data (an ArrayBuffer in the browser), in which case the
+    annotated result is sent back as binary JPEG. Base64 strings are still accepted and get
+    a base64 PNG back, as in previous versions of the App.
+
+    With `mode: 'boxes'` no image is sent back at all: the response only holds the detections,
+    with normalized coordinates, and the browser draws them over the image it already has.
+
+    Requests are queued to the inference pool: a new image from the same client replaces its
+    queued one, and a 'busy' error is sent back when the queue is full.
+    """
     try:
-        image_data = data.get('image')             # Get the base64-encoded image data from the message sent by the UI
+        image_data = data.get('image')             # Get the image data (binary or base64-encoded) from the message sent by the UI
         confidence = data.get('confidence', 0.5)   # Get the confidence threshold from the message, or use a default value of 0.5 if not provided
         if not image_data:
-            ui.send_message('detection_error', {'error': 'No image data'})
+            ui.send_message('detection_error', {'error': 'No image data'}, room=client_id)
             return
 
-        image_bytes = base64.b64decode(image_data)
-        pil_image = Image.open(io.BytesIO(image_bytes))
+        # Binary data is sent as is by Socket.IO, avoiding the ~33% size overhead of base64
+        binary = isinstance(image_data, (bytes, bytearray, memoryview))
+        image_bytes = bytes(image_data) if binary else base64.b64decode(image_data)
+        image_format = "JPEG" if binary else "PNG"
+        mode = data.get('mode', 'image')
+        quality = data.get('quality', JPEG_QUALITY)
 
-        start_time = time.time() * 1000
-        results = object_detection.detect(pil_image, confidence=confidence)  # Perform object detection on the input image with the specified confidence threshold
-        diff = time.time() * 1000 - start_time
+        key = ResultCache.key(image_bytes)
 
-        if results is None:
-            ui.send_message('detection_error', {'error': 'No results returned'})
-            return
+        if cache.contains(key, confidence):
+            # Same image as before, with a different threshold: no need to wait for a worker
+            future = Future()
+            try:
+                future.set_result(run_detection(image_bytes, confidence, mode, image_format, quality, 0.0, key))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            future = pool.submit(client_id, lambda queue_wait_ms: run_detection(
+                image_bytes, confidence, mode, image_format, quality, queue_wait_ms, key))
+        future.add_done_callback(lambda f: send_detection_result(client_id, f, not binary))
 
-        img_with_boxes = object_detection.draw_bounding_boxes(pil_image, results) # Draw bounding boxes around the detected objects in the input image
+    except QueueFull:
+        ui.send_message('detection_error', {'error': 'The board is busy, please try again', 'busy': True}, room=client_id)
+    except Exception as e:
+        ui.send_message('detection_error', {'error': str(e)}, room=client_id)
 
-        # Convert the resulting image with bounding boxes back to base64 to send it back to the UI
-        if img_with_boxes is not None:
-            img_buffer = io.BytesIO()
-            img_with_boxes.save(img_buffer, format="PNG")
-            img_buffer.seek(0)
-            b64_result = base64.b64encode(img_buffer.getvalue()).decode("utf-8")
-        else:
-            img_buffer = io.BytesIO()
-            pil_image.save(img_buffer, format="PNG")
-            img_buffer.seek(0)
-            b64_result = base64.b64encode(img_buffer.getvalue()).decode("utf-8")
-
-        # Prepare the response with the detection results
-        response = {
-            'success': True,
-            'result_image': b64_result,
-            'detection_count': len(results.get("detection", [])) if results else 0,
-            'processing_time': f"{diff:.2f} ms"
-        }
-        ui.send_message('detection_result', response)
+async def on_detect_upload(request: Request, confidence: float = 0.5, quality: int = JPEG_QUALITY, mode: str = "image"):
+    """HTTP alternative: POST the raw image file as the request body, get the annotated JPEG back.
+
+    With `?mode=boxes` the response is the JSON detection list instead of an image.
+    Requests from the same host follow the same latest-wins queueing as the web page:
+    a replaced request gets a 409, and a full queue a 503.
+    """
+    image_bytes = await request.body()
+    if not image_bytes:
+        return Response(content="No image data", status_code=400)
+
+    key = f"http:{request.client.host if request.client else ''}"
+    try:
+        future = pool.submit(key, lambda queue_wait_ms: run_detection(
+            image_bytes, confidence, mode, "JPEG", quality, queue_wait_ms))
+    except QueueFull as e:
+        return Response(content=f"Busy: {e}", status_code=503, headers={'Retry-After': '1'})
 
+    try:
+        response = await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        if not future.cancelled():
+            raise
+        return Response(content="Replaced by a newer request", status_code=409)
     except Exception as e:
-        ui.send_message('detection_error', {'error': str(e)})
+        return Response(content=str(e), status_code=500)
+
+    timing = response['timing']
+    if mode == "boxes":
+        return {'detections': response['detections'], 'detection_count': response['detection_count'], 'timing': timing}
+    return Response(content=response['result_image'], media_type="image/jpeg", headers={
+        'X-Detection-Count': str(response['detection_count']),
+        'X-Processing-Time': response['processing_time'],
+        'X-Timing': ", ".join(f"{k}={v}" for k, v in timing.items()),
+    })
 
 ui = WebUI()
 
 ui.on_message('detect_objects', on_detect_objects)
+ui.on_disconnect(lambda sid, data=None: pool.cancel(sid))
+ui.expose_api("POST", "/detect", on_detect_upload)
 
 App.run()
@@ -8,6 +8,7 @@ const errorContainer = document.getElementById('error-container');
 const targetObjects = ['book', 'bottle', 'chair', 'cup', 'cell phone'];
 let foundObjects = [];
 let gameStarted = false;
+const activeTracks = new Map(); // track id -> label of the objects currently in the scene
 
 // UI Elements
 const gameIntro = document.getElementById('game-intro');
@@ -18,10 +19,14 @@ const videoFeedContainer = document.getElementById('videoFeedContainer');
 const winScreen = document.getElementById('win-screen');
 const playAgainBtn = document.getElementById('play-again-btn');
 
+// Detections arrive as tracker events, one message per frame. The board drops frames for this page while
+// it has not acknowledged the previous ones, ?max_rate=<fps> caps the rate further.
+const DETECTION_OPTIONS = { ack: true, max_rate: Number(new URLSearchParams(location.search).get('max_rate')) || 0 };
+
 const ui = new WebUI();
 ui.on_connect(onUIConnected);
 ui.on_disconnect(onUIDisconnected);
-ui.on_message('detection', handleDetection);
+ui.on_message('tracks', handleTracks);
 
 initializeConfidenceSlider();
 renderObjectsToFind();
@@ -34,6 +39,7 @@ function onUIConnected() {
     errorContainer.style.display = 'none';
     errorContainer.textContent = '';
   }
+  ui.send_message('detections_options', DETECTION_OPTIONS);
 }
 
 function onUIDisconnected() {
@@ -48,6 +54,8 @@ function startGame() {
   gameIntro.classList.add('hidden');
   gameContent.classList.remove('hidden');
   updateFoundCounter();
+  // Objects already in front of the camera count without having to leave and enter again
+  activeTracks.forEach(content => handleDetection({ content }));
 }
 
 function resetGame() {
@@ -88,6 +96,18 @@ function renderObjectsToFind() {
   });
 }
 
+function handleTracks(frame) {
+  frame.events.forEach(([event, trackId, content]) => {
+    if (event === 'exit') {
+      activeTracks.delete(trackId);
+    } else {
+      activeTracks.set(trackId, content);
+      handleDetection({ content });
+    }
+  });
+  ui.send_message('detections_ack');
+}
+
 function handleDetection(detection) {
   if (!gameStarted) {
     return;
@@ -2,24 +2,47 @@
 #
 # SPDX-License-Identifier: MPL-2.0
 
+import time
+from pathlib import Path
+
 from arduino.app_utils import App
 from arduino.app_bricks.web_ui import WebUI
 from arduino.app_bricks.video_objectdetection import VideoObjectDetection
-from datetime import datetime, UTC
+from detection_feed import DetectionFeed
+from recorder import DetectionRecorder
+from tracker import IoUTracker
 
 ui = WebUI()
 detection_stream = VideoObjectDetection()
 
+feed = DetectionFeed(ui)
+feed.register(ui)
+
 ui.on_message("override_th", lambda sid, threshold: detection_stream.override_threshold(threshold))
 
-def send_detections_to_ui(detections: dict):
-  for key, value in detections.items():
-    entry = {
-      "content": key,
-      "timestamp": datetime.now(UTC).isoformat()
-    }
-    ui.send_message("detection", message=entry)
+# Objects are tracked across frames: instead of every detection of every frame, the UI gets
+# enter, update (at most once a second per object) and exit events, see tracker.py
+tracker = IoUTracker(iou_threshold=0.3, max_age=1.0, update_interval=1.0)
+
+# Opt-in: record every frame's detections to CSV files in `recordings/`, with per-minute
+# rollups answering GET /detections/per_minute and GET /detections/seen, see recorder.py
+RECORD_DETECTIONS = False
+recorder = None
+if RECORD_DETECTIONS:
+  recorder = DetectionRecorder(Path(__file__).resolve().parent.parent / "recordings", retention_days=7)
+  ui.expose_api("GET", "/detections/per_minute", recorder.counts_per_minute)
+  ui.expose_api("GET", "/detections/seen", recorder.seen)
+
+def send_track_events(detections: dict):
+  if recorder:
+    recorder.record(detections)
+  feed.publish_events(tracker.update(detections))
+
+detection_stream.on_detect_all(send_track_events)
 
-detection_stream.on_detect_all(send_detections_to_ui)
+def loop():
+  # Objects that left the scene must exit even when no new frame is delivered
+  feed.publish_events(tracker.expire())
+  time.sleep(0.5)
 
-App.run()
+App.run(user_loop=loop)
@@ -28,8 +28,15 @@ ui.on_message('movement', data => {
   setValues(data);
 });
 
-ui.on_message('sample', s => {
-  pushSample(s);
+// Samples arrive in binary batches: a float64 base time followed by
+// float32 rows of (t - base, x, y, z), see BatchStreamer in stream.py
+ui.on_message('samples', buffer => {
+  const base = new DataView(buffer).getFloat64(0, true);
+  const rows = new Float32Array(buffer, 8);
+  for (let i = 0; i + 3 < rows.length; i += 4) {
+    pushSample({ t: base + rows[i], x: rows[i + 1], y: rows[i + 2], z: rows[i + 3] });
+  }
+  drawPlot();
 });
 
 function onUIConnected() {
@@ -99,7 +106,6 @@ function drawPlot() {
 function pushSample(s) {
   samples.push(s);
   if (samples.length > maxSamples) samples.shift();
-  drawPlot();
 }
 
 function renderClasses(d) {
@@ -175,7 +181,8 @@ fetch('/samples')
   .then(r => r.json())
   .then(list => {
     if (Array.isArray(list)) {
-      list.forEach(s => pushSample(s));
+      list.forEach(([t, x, y, z]) => pushSample({ t, x, y, z }));
+      drawPlot();
     }
   })
   .catch(e => console.debug('Failed to load /samples', e));
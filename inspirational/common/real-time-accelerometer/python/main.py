@@ -5,11 +5,18 @@
 from arduino.app_utils import *
 from arduino.app_bricks.web_ui import WebUI
 from arduino.app_bricks.motion_detection import MotionDetection
-import pandas as pd
-from collections import deque
+from stream import SampleRing, BatchStreamer  # user module for sample buffering and streaming
+import recording  # user module for recording and replaying sensor sessions
 import time
 
 
+# Sensor sessions: set RECORD_FILE to save every incoming sample to a binary file,
+# or REPLAY_FILE to feed a saved session through record_sensor_movement instead of
+# the board (REPLAY_SPEED 1.0 = original timing, 0 = as fast as possible)
+RECORD_FILE = None
+REPLAY_FILE = None
+REPLAY_SPEED = 1.0
+
 # Instantiate the MotionDetection brick with a confidence threshold
 CONFIDENCE = 0.4
 motion_detection = MotionDetection(confidence=CONFIDENCE)
@@ -18,22 +25,16 @@ motion_detection = MotionDetection(confidence=CONFIDENCE)
 logger = Logger("real-time-accelerometer")
 logger.debug(f"MotionDetection instantiated with confidence={CONFIDENCE}")
 
-# Dataframe holding the last classification probabilities
-detection_df = pd.DataFrame(
-    {
-        'idle': [0.0],
-        'snake': [0.0],
-        'updown': [0.0],
-        'wave' : [0.0]
-    }
-)
+# Last classification probabilities, a fixed set of labels updated in place
+MOVEMENTS = ('idle', 'snake', 'updown', 'wave')
+detection = dict.fromkeys(MOVEMENTS, 0.0)
 
 # Instantiate WebUI brick
 web_ui = WebUI()
 
 # Expose a simple HTTP API to fetch the latest detection
 def _get_detection():
-    return detection_df.to_dict(orient='records')[0]
+    return dict(detection)
 
 web_ui.expose_api("GET", "/detection", _get_detection)
 
@@ -41,7 +42,7 @@ web_ui.expose_api("GET", "/detection", _get_detection)
 web_ui.on_connect(
     lambda sid: (
         logger.debug(f"Client connected: {sid} - sending current detection"),
-        web_ui.send_message('movement', detection_df.to_dict(orient='records')[0])
+        web_ui.send_message('movement', dict(detection))
     )
 )
 logger.debug("Registered on_connect handler for WebUI")
@@ -55,48 +56,47 @@ def on_movement_detected(classification: dict):
         return
 
     try:
-        global detection_df
-        detection_df = pd.DataFrame(
-            {
-                'idle': [classification.get('idle', 0.0)],
-                'snake': [classification.get('snake', 0.0)],
-                'updown': [classification.get('updown', 0.0)],
-                'wave' : [classification.get('wave', 0.0)]
-            }
-        )
-
-        logger.debug(f"Updated detection_df: {detection_df.to_dict(orient='records')[0]}")
+        for movement in MOVEMENTS:
+            detection[movement] = float(classification.get(movement, 0.0))
+
+        logger.debug(f"Updated detection: {detection}")
 
         # Broadcast update to connected websocket client
         try:
-            web_ui.send_message('movement', detection_df.to_dict(orient='records')[0])
+            web_ui.send_message('movement', dict(detection))
             logger.debug("Broadcasted 'movement' message to WebUI client")
         except Exception as e:
             logger.warning(f"Failed to broadcast 'movement' message: {e}")
 
     except Exception as e:
-        logger.exception(f"dataframe: Error: {e}")
+        logger.exception(f"on_movement_detected: Error: {e}")
 
 # Register movement callbacks
-motion_detection.on_movement_detection('idle', on_movement_detected)
-motion_detection.on_movement_detection('snake', on_movement_detected)
-motion_detection.on_movement_detection('updown', on_movement_detected)
-motion_detection.on_movement_detection('wave', on_movement_detected)
+for movement in MOVEMENTS:
+    motion_detection.on_movement_detection(movement, on_movement_detected)
 logger.debug("Registered movement detection callbacks for idle,snake,updown,wave")
 
 # Bridge handler: called from the sketch via Bridge.notify("record_sensor_movement", x, y, z)
 # buffer of samples for the simple time-series chart
 SAMPLES_MAX = 200
-samples = deque(maxlen=SAMPLES_MAX)
+samples = SampleRing(SAMPLES_MAX)
+
+# Samples are streamed to the UI in packed float32 batches of up to
+# STREAM_BATCH_SIZE samples, sent at least every STREAM_MAX_DELAY seconds
+STREAM_BATCH_SIZE = 20
+STREAM_MAX_DELAY = 0.1
+streamer = BatchStreamer(web_ui, 'samples', batch_size=STREAM_BATCH_SIZE, max_delay=STREAM_MAX_DELAY)
 
 # Provide a simple API to fetch recent samples for the frontend chart
 def _get_samples():
-    # return a list copy so the deque isn't exposed directly
-    return list(samples)
+    # [[t, x, y, z], ...] oldest first, converted from the ring buffer in one call
+    return samples.tolist()
 
 web_ui.expose_api("GET", "/samples", _get_samples)
 logger.info("Exposed GET /samples API")
 
+recorder = recording.Recorder(RECORD_FILE) if RECORD_FILE else None
+
 def record_sensor_movement(x: float, y: float, z: float):
     logger.debug(f"record_sensor_movement called with raw g-values: x={x}, y={y}, z={z}")
     try:
@@ -109,21 +109,16 @@ def record_sensor_movement(x: float, y: float, z: float):
         motion_detection.accumulate_samples((x_ms2, y_ms2, z_ms2))
         logger.debug("Forwarded sensor sample to motion_detection.accumulate_samples")
 
-        # Use raw x,y,z for the lightweight chart
-        sample = {
-            "t": time.time(),
-            "x": float(x),
-            "y": float(y),
-            "z": float(z)
-        }
-
-        # push into local buffer and broadcast to connected UIs
-        samples.append(sample)
+        # Use raw x,y,z for the lightweight chart: push into local buffer and stream to connected UIs
+        t = time.time()
+        if recorder is not None:
+            recorder.record(t, x, y, z)
+        samples.append(t, x, y, z)
         try:
-            web_ui.send_message('sample', sample)
+            streamer.push(t, x, y, z)
         except Exception:
             # do not break on websocket failures
-            logger.debug('Failed to emit sample websocket message')
+            logger.debug('Failed to emit samples websocket message')
 
     except Exception as e:
         logger.exception(f"record_sensor_movement: Error: {e}")
@@ -137,6 +132,20 @@ try:
 except RuntimeError:
     logger.debug("'record_sensor_movement' already registered")
 
+def replay_session():
+    """User loop replaying REPLAY_FILE over and over, logging the achieved throughput."""
+    stats = recording.replay(REPLAY_FILE, record_sensor_movement, speed=REPLAY_SPEED)
+    logger.info(f"Replayed {stats['samples']} samples in {stats['seconds']:.3f}s ({stats['rate']:.0f} samples/s)")
+    if stats['samples'] == 0:
+        time.sleep(1)
+
 # Let the App runtime manage bricks and run the web server
-logger.info("Starting App...")
-App.run()
+if REPLAY_FILE:
+    logger.info(f"Starting App, replaying {REPLAY_FILE}...")
+    App.run(user_loop=replay_session)
+else:
+    logger.info("Starting App...")
+    App.run()
+
+if recorder is not None:
+    recorder.close()
@@ -0,0 +1,89 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import os
+import threading
+import time
+import numpy as np
+
+# One 20 bytes record per sample: float64 time, float32 x, y, z (raw g-values)
+SAMPLE_DTYPE = np.dtype([('t', '<f8'), ('x', '<f4'), ('y', '<f4'), ('z', '<f4')])
+REPLAY_CHUNK = 4096
+
+
+class Recorder:
+    """Appends accelerometer samples to a raw binary file of SAMPLE_DTYPE records.
+
+    Samples are collected in a preallocated chunk and written with a single
+    call when it is full, so recording costs the sensor callback almost nothing.
+    """
+    def __init__(self, path: str, chunk_size: int = 512):
+        self.path = path
+        self._chunk = np.zeros(chunk_size, dtype=SAMPLE_DTYPE)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')  # noqa: SIM115 - kept open across record() calls until close()
+
+    def record(self, t: float, x: float, y: float, z: float):
+        with self._lock:
+            self._chunk[self._count] = (t, x, y, z)
+            self._count += 1
+            if self._count == len(self._chunk):
+                self._write()
+
+    def flush(self):
+        with self._lock:
+            self._write()
+            self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def _write(self):
+        if self._count:
+            self._file.write(self._chunk[:self._count].tobytes())
+            self._count = 0
+
+
+def load(path: str) -> np.ndarray:
+    """Memory-map a recording, without reading it into memory."""
+    if os.path.getsize(path) == 0:
+        # numpy cannot map an empty file
+        return np.zeros(0, dtype=SAMPLE_DTYPE)
+    return np.memmap(path, dtype=SAMPLE_DTYPE, mode='r')
+
+
+def replay(path: str, handler, speed: float = 1.0) -> dict:
+    """Feed a recording to `handler(x, y, z)`, the same signature used by Bridge.
+
+    Args:
+        path (str): recording file written by Recorder
+        handler (callable): sample handler, e.g. record_sensor_movement
+        speed (float): 1.0 replays with the original timing, 2.0 twice as fast,
+            0 as fast as possible
+
+    Returns:
+        dict: number of samples, elapsed seconds and achieved samples per second
+    """
+    samples = load(path)
+    if len(samples) == 0:
+        return {"samples": 0, "seconds": 0.0, "rate": 0.0}
+
+    t0 = samples['t'][0]
+    start = time.perf_counter()
+    # Convert one chunk at a time to plain floats: memory stays bounded and the
+    # handler receives the same Python floats Bridge would pass
+    for i in range(0, len(samples), REPLAY_CHUNK):
+        chunk = samples[i:i + REPLAY_CHUNK]
+        offsets = (chunk['t'] - t0).tolist()
+        xyz = np.column_stack((chunk['x'], chunk['y'], chunk['z'])).astype(np.float64).tolist()
+        for offset, (x, y, z) in zip(offsets, xyz, strict=True):
+            if speed > 0:
+                delay = offset / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            handler(x, y, z)
+    elapsed = time.perf_counter() - start
+    return {"samples": len(samples), "seconds": elapsed, "rate": len(samples) / elapsed if elapsed > 0 else 0.0}
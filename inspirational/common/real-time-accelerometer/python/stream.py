@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import threading
+import time
+import numpy as np
+
+FIELDS = 4  # t, x, y, z
+
+
+class SampleRing:
+    """Preallocated ring buffer of (t, x, y, z) accelerometer samples.
+
+    Every row is written twice, at `i` and `i + capacity`, so the latest
+    `capacity` samples are always available as one contiguous, ordered slice
+    without copying.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = np.zeros((2 * capacity, FIELDS), dtype=np.float64)
+        self._next = 0  # index the next sample is written to, in [0, capacity)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, t: float, x: float, y: float, z: float):
+        with self._lock:
+            i = self._next
+            self._buf[i] = self._buf[i + self.capacity] = (t, x, y, z)
+            self._next = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def tolist(self) -> list:
+        """All buffered samples as [[t, x, y, z], ...], converted in a single call."""
+        with self._lock:
+            end = self._next + self.capacity
+            return self._buf[end - self._count:end].tolist()
+
+
+class BatchStreamer:
+    """Sends samples to the Web UI in packed binary batches.
+
+    A batch is sent when `batch_size` samples are pending or `max_delay` seconds
+    have passed since the previous one, checked by a timer thread too so the last
+    samples are sent when the sensor stops. Its payload is a little-endian float64
+    base time followed by float32 rows (t - base, x, y, z).
+    """
+    def __init__(self, ui, message_type: str = 'samples', batch_size: int = 20, max_delay: float = 0.1):
+        self.ui = ui
+        self.message_type = message_type
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._pending = np.zeros((batch_size, FIELDS), dtype=np.float64)
+        self._count = 0
+        self._last_sent = time.monotonic()
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, name="batch-streamer", daemon=True).start()
+
+    def push(self, t: float, x: float, y: float, z: float):
+        with self._lock:
+            self._pending[self._count] = (t, x, y, z)
+            self._count += 1
+            now = time.monotonic()
+            if self._count < self.batch_size and now - self._last_sent < self.max_delay:
+                return
+            payload = self._take(now)
+        self.ui.send_message(self.message_type, payload)
+
+    def _run(self):
+        while True:
+            payload = None
+            with self._lock:
+                now = time.monotonic()
+                wait = self._last_sent + self.max_delay - now
+                if wait <= 0:
+                    if self._count:
+                        payload = self._take(now)
+                    wait = self.max_delay
+            if payload is not None:
+                self.ui.send_message(self.message_type, payload)
+            time.sleep(wait)
+
+    def _take(self, now: float) -> bytes:
+        # Must be called with _lock held
+        payload = pack(self._pending[:self._count])
+        self._count = 0
+        self._last_sent = now
+        return payload
+
+
+def pack(rows: np.ndarray) -> bytes:
+    """Pack (t, x, y, z) rows as float64 base time + float32 (t - base, x, y, z) rows."""
+    base = rows[0, 0]
+    packed = rows.astype('<f4')
+    packed[:, 0] = rows[:, 0] - base
+    return np.float64(base).astype('<f8').tobytes() + packed.tobytes()
@@ -7,10 +7,31 @@ import psutil
 import time
 from arduino.app_bricks.dbstorage_tsstore import TimeSeriesStore
 from arduino.app_bricks.web_ui import WebUI
-from arduino.app_utils import App
+from arduino.app_utils import App, Bridge
+import profiler  # user module for per-handler call statistics
+from retention import RetentionManager, RetentionPolicy  # user module for compaction of old samples
+
+# Sampling period in seconds, can be lowered down to MIN_SAMPLE_PERIOD
+SAMPLE_PERIOD = 5.0
+MIN_SAMPLE_PERIOD = 0.1
+
+# Opt-in: record calls, errors and latency percentiles of every ui.on_message,
+# ui.expose_api and Bridge.provide handler, stored as `handler_*` measures
+PROFILE_HANDLERS = False
 
 db = TimeSeriesStore()
 
+# Raw samples are kept for a few days, then compacted into hourly/daily mean/min/max
+# rollups (e.g. `cpu_1h_mean`) and deleted in small background batches
+retention = RetentionManager(
+    db,
+    default=RetentionPolicy(raw_days=3, windows=("1h",)),
+    policies={
+        'cpu': RetentionPolicy(raw_days=7, windows=("1h", "1d")),
+        'mem': RetentionPolicy(raw_days=7, windows=("1h", "1d")),
+    },
+)
+
 def on_get_samples(resource: str, start: str, aggr_window: str):
     samples = db.read_samples(measure=resource, start_from=start, aggr_window=aggr_window, aggr_func="mean", limit=100)
     res = []
@@ -23,26 +44,103 @@ def on_get_samples(resource: str, start: str, aggr_window: str):
     return res
 
 ui = WebUI()
+if PROFILE_HANDLERS:
+    # Must happen before any handler is registered
+    profiler.instrument(ui, Bridge)
 ui.expose_api("GET", "/get_samples/{resource}/{start}/{aggr_window}", on_get_samples)
+ui.expose_api("GET", "/retention_report", retention.report)
+
+
+class SystemSampler:
+    """Collects system metrics without blocking.
+
+    CPU usage is computed by psutil as the delta since the previous call
+    (`interval=None`), and I/O rates as counter deltas over the elapsed time,
+    so a tick only costs the time needed to read the counters.
+    """
+    def __init__(self):
+        self.process = psutil.Process()
+        # The first non-blocking cpu_percent() call only sets the baseline
+        psutil.cpu_percent(interval=None)
+        psutil.cpu_percent(interval=None, percpu=True)
+        self.last_time = time.monotonic()
+        self.last_disk = psutil.disk_io_counters()
+        self.last_net = psutil.net_io_counters()
+
+    def sample(self):
+        """Return a dict of measure name -> value for the current tick."""
+        now = time.monotonic()
+        elapsed = max(now - self.last_time, 1e-6)
+        self.last_time = now
+
+        metrics = {
+            'cpu': psutil.cpu_percent(interval=None),
+            'mem': psutil.virtual_memory().percent,
+            'app_rss': self.process.memory_info().rss,
+        }
+        for core, percent in enumerate(psutil.cpu_percent(interval=None, percpu=True)):
+            metrics[f'cpu_core{core}'] = percent
+
+        load_1m, load_5m, load_15m = psutil.getloadavg()
+        metrics.update(load_1m=load_1m, load_5m=load_5m, load_15m=load_15m)
+
+        disk = psutil.disk_io_counters()
+        if disk is not None and self.last_disk is not None:
+            metrics['disk_read_bps'] = (disk.read_bytes - self.last_disk.read_bytes) / elapsed
+            metrics['disk_write_bps'] = (disk.write_bytes - self.last_disk.write_bytes) / elapsed
+        self.last_disk = disk
+
+        net = psutil.net_io_counters()
+        if net is not None and self.last_net is not None:
+            metrics['net_rx_bps'] = (net.bytes_recv - self.last_net.bytes_recv) / elapsed
+            metrics['net_tx_bps'] = (net.bytes_sent - self.last_net.bytes_sent) / elapsed
+        self.last_net = net
+
+        # Thermal sensors are only available on some platforms (e.g. Linux)
+        if hasattr(psutil, 'sensors_temperatures'):
+            for chip, entries in psutil.sensors_temperatures().items():
+                for i, entry in enumerate(entries):
+                    metrics[f'temp_{chip}_{entry.label or i}'.replace(' ', '_')] = entry.current
+
+        return metrics
+
+
+def write_samples(metrics: dict, ts: int):
+    """Write all the metrics of a tick in one pass, sharing the same timestamp."""
+    for measure, value in metrics.items():
+        db.write_sample(measure, float(value), ts)
+    retention.track(metrics)
+
+
+sampler = SystemSampler()
+retention.start()
+period = max(SAMPLE_PERIOD, MIN_SAMPLE_PERIOD)
+next_tick = time.monotonic()
 
 def get_events():
+    global next_tick
+
     ts = int(datetime.datetime.now().timestamp() * 1000)
+    metrics = sampler.sample()
+    if PROFILE_HANDLERS:
+        metrics.update(profiler.collect())
+    write_samples(metrics, ts)
 
-    # CPU usage
-    cpu_percent = psutil.cpu_percent(interval=1)
-    db.write_sample('cpu', cpu_percent, ts)
     ui.send_message('cpu_usage', {
-        "value": cpu_percent,
+        "value": metrics['cpu'],
         "ts": ts
     })
-    # Memory usage
-    mem_percent = psutil.virtual_memory().percent
-    db.write_sample('mem', mem_percent, ts)
     ui.send_message('memory_usage', {
-        "value": mem_percent,
+        "value": metrics['mem'],
         "ts": ts
     })
 
-    time.sleep(5)
+    # Sleep until the next scheduled tick, so the period does not drift with the sampling cost
+    next_tick += period
+    delay = next_tick - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+    else:
+        next_tick = time.monotonic()
 
 App.run(user_loop=get_events)
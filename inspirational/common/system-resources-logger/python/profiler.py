@@ -0,0 +1,130 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import functools
+import inspect
+import random
+import re
+import threading
+import time
+
+# Latencies kept per handler and interval; beyond this, reservoir sampling keeps percentiles representative
+MAX_LATENCY_SAMPLES = 1024
+PERCENTILES = (50, 95, 99)
+
+_lock = threading.Lock()
+_stats = {}  # measure prefix -> HandlerStats
+
+
+class HandlerStats:
+    """Call statistics of one handler since the last collect()."""
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.latencies = []
+
+    def record(self, elapsed_ms: float, failed: bool):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        if failed:
+            self.errors += 1
+        if len(self.latencies) < MAX_LATENCY_SAMPLES:
+            self.latencies.append(elapsed_ms)
+        else:
+            i = random.randrange(self.calls)
+            if i < MAX_LATENCY_SAMPLES:
+                self.latencies[i] = elapsed_ms
+
+
+def instrument(ui=None, bridge=None):
+    """Wrap every handler registered from now on with call statistics.
+
+    Patches `ui.on_message`, `ui.expose_api` and `bridge.provide`, so it must be
+    called before the handlers to profile are registered.
+
+    Args:
+        ui (WebUI): WebUI instance whose handlers should be profiled
+        bridge (Bridge): Bridge whose provided methods should be profiled
+    """
+    if ui is not None:
+        _patch(ui, "on_message", lambda args: f"ws_{args[0]}")
+        _patch(ui, "expose_api", lambda args: f"api_{args[0]}_{args[1]}")
+    if bridge is not None:
+        _patch(bridge, "provide", lambda args: f"bridge_{args[0]}")
+
+
+def collect() -> dict:
+    """Return per-handler metrics for the interval since the previous call and reset them.
+
+    For every handler that was called, the measures are `handler_<name>_calls`,
+    `_errors`, `_busy_ms` (total time spent) and `_p50_ms`, `_p95_ms`, `_p99_ms`.
+    """
+    with _lock:
+        snapshot = list(_stats.items())
+        for prefix, _ in snapshot:
+            _stats[prefix] = HandlerStats()
+
+    metrics = {}
+    for prefix, stats in snapshot:
+        if stats.calls == 0:
+            continue
+        metrics[f"{prefix}_calls"] = stats.calls
+        metrics[f"{prefix}_errors"] = stats.errors
+        metrics[f"{prefix}_busy_ms"] = stats.total_ms
+        latencies = sorted(stats.latencies)
+        for p in PERCENTILES:
+            rank = min(len(latencies) - 1, max(0, round(p / 100 * len(latencies)) - 1))
+            metrics[f"{prefix}_p{p}_ms"] = latencies[rank]
+    return metrics
+
+
+def _patch(target, method_name, name_of):
+    original = getattr(target, method_name)
+
+    def register(*args, **kwargs):
+        # The handler is always the last positional argument of the registration call
+        if args and callable(args[-1]):
+            prefix = "handler_" + re.sub(r"[^0-9A-Za-z]+", "_", name_of(args)).strip("_")
+            args = (*args[:-1], _wrap(args[-1], prefix))
+        return original(*args, **kwargs)
+
+    setattr(target, method_name, staticmethod(register) if isinstance(target, type) else register)
+
+
+def _wrap(handler, prefix):
+    with _lock:
+        _stats.setdefault(prefix, HandlerStats())
+
+    def record(start, failed):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with _lock:
+            # collect() swaps the stats object, always record into the current one
+            _stats[prefix].record(elapsed_ms, failed)
+
+    # functools.wraps keeps the signature visible, which expose_api relies on for path parameters
+    if inspect.iscoroutinefunction(handler):
+        @functools.wraps(handler)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = await handler(*args, **kwargs)
+            except Exception:
+                record(start, True)
+                raise
+            record(start, False)
+            return result
+        return async_wrapper
+
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = handler(*args, **kwargs)
+        except Exception:
+            record(start, True)
+            raise
+        record(start, False)
+        return result
+    return wrapper
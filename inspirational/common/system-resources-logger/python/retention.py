@@ -0,0 +1,184 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import datetime
+import threading
+import time
+
+WINDOWS = {"1m": 60_000, "1h": 3_600_000, "1d": 86_400_000}
+FUNCS = ("mean", "min", "max")
+
+DAY_MS = 86_400_000
+EPOCH = "1970-01-01T00:00:00Z"
+
+
+class RetentionPolicy:
+    """How long a measure keeps full resolution and what it is compacted into.
+
+    Args:
+        raw_days (float): days of raw samples to keep
+        windows (tuple[str]): rollup windows written before raw samples are deleted,
+            named `<measure>_<window>_<func>` (e.g. `cpu_1h_mean`)
+    """
+    def __init__(self, raw_days: float, windows: tuple = ("1h",)):
+        self.raw_days = raw_days
+        self.windows = windows
+        # Raw data is processed one span of the largest window at a time, so every
+        # rollup bucket is computed from all of its samples
+        self.span_ms = max(WINDOWS[w] for w in windows)
+
+
+class RetentionManager:
+    """Compacts expired raw samples into rollups and deletes them in the background.
+
+    Every `interval` seconds, raw samples older than the policy's `raw_days` are
+    read one span at a time, aggregated into mean/min/max rollups and then deleted.
+    At most `max_batches` spans per measure are processed per run and the thread
+    pauses between them, so a large backlog is worked off gradually.
+
+    Args:
+        db (TimeSeriesStore): the store holding the measures
+        default (RetentionPolicy): policy for tracked measures without their own policy
+        policies (dict): measure name -> RetentionPolicy
+    """
+    def __init__(self, db, default: RetentionPolicy, policies: dict = None,
+                 interval: float = 600.0, max_batches: int = 4, batch_pause: float = 1.0, batch_limit: int = 100_000):
+        self.db = db
+        self.default = default
+        self.policies = dict(policies or {})
+        self.interval = interval
+        self.max_batches = max_batches
+        self.batch_pause = batch_pause
+        self.batch_limit = batch_limit
+        self._measures = set(self.policies)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._report = {}  # measure -> counters, see report()
+
+    def track(self, measures):
+        """Put measures under retention, using the default policy if they have none."""
+        with self._lock:
+            self._measures.update(measures)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def report(self) -> dict:
+        """Storage and query time saved so far, per measure and in total.
+
+        `raw_deleted` and `rollups_written` count samples, `points_saved` is their
+        difference. `raw_read_ms` is the time spent reading the compacted raw samples
+        and `rollup_read_ms` the time needed to read the same range from the rollups.
+        """
+        with self._lock:
+            measures = {m: dict(r) for m, r in self._report.items()}
+        total = {k: sum(r[k] for r in measures.values()) for k in
+                 ("raw_deleted", "rollups_written", "points_saved", "raw_read_ms", "rollup_read_ms")}
+        return {"total": total, "measures": measures}
+
+    def run_once(self):
+        """Process expired data of every tracked measure once."""
+        with self._lock:
+            measures = sorted(self._measures)
+        for measure in measures:
+            if self._stop.is_set():
+                return
+            policy = self.policies.get(measure, self.default)
+            try:
+                self._compact(measure, policy)
+            except Exception as e:
+                print(f"Retention of '{measure}' failed: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def _compact(self, measure: str, policy: RetentionPolicy):
+        now_ms = int(time.time() * 1000)
+        cutoff = now_ms - int(policy.raw_days * DAY_MS)
+        cutoff -= cutoff % policy.span_ms
+
+        oldest = self.db.read_samples(measure=measure, start_from=EPOCH, end_to=_iso(cutoff), limit=1)
+        if not oldest:
+            return
+        span_start = _ts_ms(oldest[0][1])
+        span_start -= span_start % policy.span_ms
+
+        for _ in range(self.max_batches):
+            if span_start >= cutoff or self._stop.is_set():
+                return
+            span_end = span_start + policy.span_ms
+            self._compact_span(measure, policy, span_start, span_end)
+            span_start = span_end
+            self._stop.wait(self.batch_pause)
+
+    def _compact_span(self, measure: str, policy: RetentionPolicy, start: int, end: int):
+        t0 = time.perf_counter()
+        # end_to is inclusive with second resolution: stop a second short of `end`, which
+        # starts the next span, and keep exactly the samples in [start, end)
+        rows = self.db.read_samples(measure=measure, start_from=_iso(start), end_to=_iso(end - 1),
+                                    limit=self.batch_limit)
+        raw_read_ms = (time.perf_counter() - t0) * 1000
+        truncated = len(rows) >= self.batch_limit
+        rows = [(ts, row[2]) for row in rows if start <= (ts := _ts_ms(row[1])) < end]
+        if not rows:
+            return
+        if truncated:
+            # Compacting a truncated span would write wrong rollups, leave it for a larger limit
+            print(f"Retention of '{measure}' skipped a span with more than {self.batch_limit} samples")
+            return
+
+        written = 0
+        for window in policy.windows:
+            size = WINDOWS[window]
+            buckets = {}  # bucket start -> [count, sum, min, max]
+            for ts, value in rows:
+                bucket = buckets.get(ts - ts % size)
+                if bucket is None:
+                    buckets[ts - ts % size] = [1, value, value, value]
+                else:
+                    bucket[0] += 1
+                    bucket[1] += value
+                    bucket[2] = min(bucket[2], value)
+                    bucket[3] = max(bucket[3], value)
+            for bucket_start, (count, total, low, high) in buckets.items():
+                for func, value in zip(FUNCS, (total / count, low, high), strict=True):
+                    # Same name and timestamps as rollups maintained on ingest, so rewriting one is idempotent
+                    self.db.write_sample(f"{measure}_{window}_{func}", value, bucket_start)
+                    written += 1
+
+        self.db.delete_samples(measure=measure, start_from=_iso(start), end_to=_iso(end - 1))
+
+        # Time the same range read from the coarsest rollup, to report the query time saved
+        coarsest = max(policy.windows, key=WINDOWS.get)
+        t0 = time.perf_counter()
+        self.db.read_samples(measure=f"{measure}_{coarsest}_mean", start_from=_iso(start), end_to=_iso(end - 1))
+        rollup_read_ms = (time.perf_counter() - t0) * 1000
+
+        with self._lock:
+            r = self._report.setdefault(measure, {"raw_deleted": 0, "rollups_written": 0, "points_saved": 0,
+                                                  "raw_read_ms": 0.0, "rollup_read_ms": 0.0})
+            r["raw_deleted"] += len(rows)
+            r["rollups_written"] += written
+            r["points_saved"] += len(rows) - written
+            r["raw_read_ms"] += raw_read_ms
+            r["rollup_read_ms"] += rollup_read_ms
+
+
+def _iso(ts_ms: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts_ms / 1000))
+
+
+def _ts_ms(ts) -> int:
+    if isinstance(ts, str):
+        ts = datetime.datetime.fromisoformat(ts).timestamp() * 1000
+    elif isinstance(ts, datetime.datetime):
+        ts = ts.timestamp() * 1000
+    return int(ts)
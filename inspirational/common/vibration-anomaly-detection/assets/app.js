@@ -28,11 +28,27 @@ const ui = new WebUI();
 ui.on_connect(onUIConnected);
 ui.on_disconnect(onUIDisconnected);
 ui.on_message('anomaly_detected', handleAnomalyDetected);
+// By default the plot shows one point per window: the RMS vibration of each axis,
+// computed on the board. Raw samples are only sent when explicitly requested.
+let showRawSamples = false;
+ui.on_message('window_summary', summary => {
+  if (!showRawSamples) pushSample({ x: summary.rms[0], y: summary.rms[1], z: summary.rms[2] });
+});
 ui.on_message('sample', s => {
-  pushSample(s);
+  if (showRawSamples) pushSample(s);
+});
+
+const rawSamplesToggle = document.getElementById('raw-samples-toggle');
+rawSamplesToggle.addEventListener('change', () => {
+  showRawSamples = rawSamplesToggle.checked;
+  samples.length = 0;
+  ui.send_message('raw_samples', { enabled: showRawSamples });
+  drawPlot();
 });
 
 function onUIConnected() {
+  // The board forgets the subscription when the connection drops
+  if (showRawSamples) ui.send_message('raw_samples', { enabled: true });
   if (errorContainer) {
     errorContainer.style.display = 'none';
     errorContainer.textContent = '';
@@ -0,0 +1,132 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import queue
+import threading
+from datetime import datetime
+import numpy as np
+from arduino.app_bricks.dbstorage_sqlstore import SQLStore
+
+TABLE = "anomaly_events"
+
+
+class EventCapture:
+    """Keeps the last samples in a ring buffer and captures a window around each anomaly.
+
+    A capture holds `pre` samples before the trigger and `post` samples after it.
+    Once complete, it is handed to `on_capture(event)` - typically EventStore.save,
+    which only enqueues it - so the sensor callback never waits on disk I/O.
+
+    Args:
+        pre (int): samples kept before the trigger
+        post (int): samples collected after the trigger
+        on_capture (callable): called with the completed event dict
+    """
+    def __init__(self, pre: int, post: int, on_capture):
+        self.pre = pre
+        self.post = post
+        self.on_capture = on_capture
+        # Rows are mirrored at i and i + pre, so the last `pre` rows are one contiguous slice
+        self._ring = np.zeros((2 * pre, 4), dtype=np.float64)
+        self._next = 0
+        self._count = 0
+        self._pending = []  # captures waiting for their post-trigger samples
+        self._lock = threading.Lock()
+
+    def add(self, t: float, x: float, y: float, z: float):
+        completed = []
+        with self._lock:
+            i = self._next
+            self._ring[i] = self._ring[i + self.pre] = (t, x, y, z)
+            self._next = (i + 1) % self.pre
+            self._count = min(self._count + 1, self.pre)
+
+            for capture in self._pending:
+                capture["rows"][capture["filled"]] = (t, x, y, z)
+                capture["filled"] += 1
+            while self._pending and self._pending[0]["filled"] == len(self._pending[0]["rows"]):
+                completed.append(self._pending.pop(0))
+
+        for capture in completed:
+            self.on_capture(capture)
+
+    def trigger(self, score: float, t: float):
+        """Start a capture: copy the pre-trigger samples and collect the post-trigger ones."""
+        with self._lock:
+            end = self._next + self.pre
+            pre_rows = self._ring[end - self._count:end]
+            rows = np.zeros((len(pre_rows) + self.post, 4), dtype=np.float64)
+            rows[:len(pre_rows)] = pre_rows
+            self._pending.append({"score": score, "t": t, "n_pre": len(pre_rows), "rows": rows,
+                                  "filled": len(pre_rows)})
+
+
+class EventStore:
+    """Persists anomaly events to SQLStore from a background writer thread.
+
+    Samples are stored as a float32 BLOB of (t - trigger time, x, y, z) rows,
+    next to the event metadata, which is indexed by time for fast listing.
+    """
+    def __init__(self, database_name: str = "vibration_events", max_queue: int = 16):
+        self.db = SQLStore(database_name=database_name)
+        self._queue = queue.Queue(maxsize=max_queue)
+
+    def start(self):
+        """Start SQLStore, create the events table and the writer thread."""
+        self.db.start()
+        self.db.create_table(
+            TABLE,
+            {
+                "id": "INTEGER PRIMARY KEY",
+                "ts": "REAL",  # trigger time, seconds since epoch
+                "timestamp": "TEXT",
+                "score": "REAL",
+                "n_pre": "INTEGER",
+                "n_samples": "INTEGER",
+                "samples": "BLOB",
+            }
+        )
+        self.db.execute_sql(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_ts ON {TABLE} (ts)")
+        threading.Thread(target=self._writer, name="anomaly-events", daemon=True).start()
+
+    def save(self, capture: dict):
+        """Enqueue a completed capture; drops it if the writer is too far behind."""
+        try:
+            self._queue.put_nowait(capture)
+        except queue.Full:
+            print(f"Anomaly event at {capture['t']} dropped, writer queue is full")
+
+    def list_events(self, limit: int = 20) -> list[dict]:
+        """Most recent events first, without their samples."""
+        return self.db.execute_sql(
+            f"SELECT id, ts, timestamp, score, n_pre, n_samples FROM {TABLE} ORDER BY ts DESC LIMIT {int(limit)}"
+        ) or []
+
+    def get_event(self, event_id: int) -> dict | None:
+        """One event with its samples as columns: {"t": [...], "x": [...], "y": [...], "z": [...]}."""
+        rows = self.db.execute_sql(f"SELECT * FROM {TABLE} WHERE id = {int(event_id)}") or []
+        if not rows:
+            return None
+        event = dict(rows[0])
+        samples = np.frombuffer(event.pop("samples"), dtype="<f4").reshape(-1, 4)
+        event["samples"] = {axis: samples[:, i].tolist() for i, axis in enumerate(("t", "x", "y", "z"))}
+        return event
+
+    def _writer(self):
+        while True:
+            capture = self._queue.get()
+            try:
+                rows = capture["rows"]
+                packed = rows.astype("<f4")
+                packed[:, 0] = rows[:, 0] - capture["t"]
+                self.db.store(TABLE, {
+                    "ts": capture["t"],
+                    "timestamp": datetime.fromtimestamp(capture["t"]).isoformat(),
+                    "score": float(capture["score"]),
+                    "n_pre": capture["n_pre"],
+                    "n_samples": len(rows),
+                    "samples": packed.tobytes(),
+                }, create_table=False)
+            except Exception as e:
+                print(f"Failed to store anomaly event: {e}")
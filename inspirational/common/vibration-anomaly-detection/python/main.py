@@ -3,10 +3,13 @@
 # SPDX-License-Identifier: MPL-2.0
 
 import json
+import time
 from datetime import datetime
 from arduino.app_utils import *
 from arduino.app_bricks.web_ui import WebUI
 from arduino.app_bricks.vibration_anomaly_detection import VibrationAnomalyDetection
+from summary import WindowSummarizer  # user module for per-window vibration statistics
+from events import EventCapture, EventStore  # user module for anomaly event capture and storage
 
 logger = Logger("vibration-detector")
 
@@ -21,8 +24,49 @@ def on_override_th(value: float):
 
     logger.info(f"Setting new anomaly threshold: {vibration_detection.anomaly_detection_threshold}")
 
+# The UI receives one summary (RMS, peak, crest factor and a small FFT magnitude
+# spectrum per axis) every WINDOW_SIZE samples instead of every raw sample
+SAMPLE_RATE = 62.5  # Hz, must match the sketch reading interval
+WINDOW_SIZE = 64
+SPECTRUM_BINS = 16  # 0 to disable the spectrum
+summarizer = WindowSummarizer(WINDOW_SIZE, SAMPLE_RATE, SPECTRUM_BINS)
+
+# Each anomaly is stored with the samples from PRE_TRIGGER_SECONDS before to
+# POST_TRIGGER_SECONDS after it; writes happen on a background thread
+PRE_TRIGGER_SECONDS = 2.0
+POST_TRIGGER_SECONDS = 1.0
+event_store = EventStore()
+event_store.start()
+capture = EventCapture(
+    pre=int(PRE_TRIGGER_SECONDS * SAMPLE_RATE),
+    post=int(POST_TRIGGER_SECONDS * SAMPLE_RATE),
+    on_capture=event_store.save,
+)
+
+# Clients that asked for raw samples as well. Replaced rather than mutated, so
+# the sensor callback can iterate it while clients subscribe or leave
+raw_subscribers = frozenset()
+
+def on_raw_samples(sid, data):
+    global raw_subscribers
+    if isinstance(data, dict) and data.get("enabled"):
+        raw_subscribers = raw_subscribers | {sid}
+    else:
+        raw_subscribers = raw_subscribers - {sid}
+
 ui = WebUI()
 ui.on_message("override_th", lambda sid, threshold: on_override_th(threshold))
+ui.on_message("raw_samples", on_raw_samples)
+ui.on_disconnect(lambda sid, data=None: on_raw_samples(sid, None))
+
+def on_list_events():
+    return event_store.list_events()
+
+def on_get_event(event_id: int):
+    return event_store.get_event(event_id) or {"error": f"Event {event_id} not found"}
+
+ui.expose_api("GET", "/anomaly_events", on_list_events)
+ui.expose_api("GET", "/anomaly_events/{event_id}", on_get_event)
 
 def get_fan_status(anomaly_detected: bool):
     return {
@@ -32,6 +76,7 @@ def get_fan_status(anomaly_detected: bool):
 
 # Register action to take after successful detection
 def on_detected_anomaly(anomaly_score: float, classification: dict):
+    capture.trigger(anomaly_score, time.time())
     anomaly_payload = {
         "score": anomaly_score,
         "timestamp": datetime.now().isoformat()
@@ -47,12 +92,21 @@ def record_sensor_movement(x: float, y: float, z: float):
     y_ms2 = y * 9.81
     z_ms2 = z * 9.81
 
-    # Forward raw data to UI for plotting
-    ui.send_message('sample', {'x': x_ms2, 'y': y_ms2, 'z': z_ms2})
-
     # Forward samples to the vibration_detection brick
     vibration_detection.accumulate_samples((x_ms2, y_ms2, z_ms2))
 
+    # Keep the recent samples around for anomaly event captures
+    capture.add(time.time(), x_ms2, y_ms2, z_ms2)
+
+    # Forward a summary of each complete window to the UI for plotting
+    summary = summarizer.add(x_ms2, y_ms2, z_ms2)
+    if summary is not None:
+        ui.send_message('window_summary', summary)
+
+    # Raw data only goes to the clients that asked for it
+    for sid in raw_subscribers:
+        ui.send_message('sample', {'x': x_ms2, 'y': y_ms2, 'z': z_ms2}, room=sid)
+
 # Register the Bridge RPC provider so the sketch can call into Python
 Bridge.provide("record_sensor_movement", record_sensor_movement)
 
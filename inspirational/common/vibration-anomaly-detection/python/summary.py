@@ -0,0 +1,57 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import threading
+import numpy as np
+
+
+class WindowSummarizer:
+    """Collects (x, y, z) samples into fixed-size windows and summarizes each one.
+
+    Args:
+        size (int): samples per window
+        sample_rate (float): sampling rate in Hz, used to label the spectrum
+        spectrum_bins (int): number of FFT magnitude bins per axis, 0 to disable
+    """
+    def __init__(self, size: int, sample_rate: float, spectrum_bins: int = 0):
+        self.size = size
+        self.sample_rate = sample_rate
+        self.spectrum_bins = spectrum_bins
+        self._buf = np.zeros((size, 3), dtype=np.float64)
+        self._count = 0
+        self._taper = np.hanning(size)[:, None]
+        self._lock = threading.Lock()
+
+    def add(self, x: float, y: float, z: float) -> dict | None:
+        """Add a sample, returning the window summary when the window is complete."""
+        with self._lock:
+            self._buf[self._count] = (x, y, z)
+            self._count += 1
+            if self._count < self.size:
+                return None
+            self._count = 0
+            return self._summarize(self._buf)
+
+    def _summarize(self, window: np.ndarray) -> dict:
+        """Per-axis statistics of the vibration, i.e. the signal without its mean (gravity)."""
+        mean = window.mean(axis=0)
+        ac = window - mean
+        rms = np.sqrt(np.mean(ac * ac, axis=0))
+        peak = np.abs(ac).max(axis=0)
+        crest = np.divide(peak, rms, out=np.zeros(3), where=rms > 1e-9)
+        summary = {
+            "n": self.size,
+            "mean": np.round(mean, 4).tolist(),
+            "rms": np.round(rms, 4).tolist(),
+            "peak": np.round(peak, 4).tolist(),
+            "crest": np.round(crest, 3).tolist(),
+        }
+        if self.spectrum_bins:
+            # Magnitude spectrum without the DC bin, averaged down to spectrum_bins bands per axis
+            magnitude = np.abs(np.fft.rfft(ac * self._taper, axis=0))[1:] / self.size
+            bands = np.array_split(magnitude, self.spectrum_bins, axis=0)
+            spectrum = np.stack([band.mean(axis=0) for band in bands], axis=1)
+            summary["spectrum"] = np.round(spectrum, 4).tolist()  # [axis][band]
+            summary["band_hz"] = self.sample_rate / 2 / self.spectrum_bins
+        return summary
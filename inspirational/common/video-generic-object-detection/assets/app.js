@@ -8,14 +8,14 @@ const feedbackContentElement = document.getElementById('feedback-content');
 const MAX_RECENT_SCANS = 5;
 let scans = [];
 
+// Detections arrive as tracker events, one message per frame. The board drops frames for this page while
+// it has not acknowledged the previous ones, ?max_rate=<fps> caps the rate further.
+const DETECTION_OPTIONS = { ack: true, max_rate: Number(new URLSearchParams(location.search).get('max_rate')) || 0 };
+
 const ui = new WebUI();
 ui.on_connect(onUIConnected);
 ui.on_disconnect(onUIDisconnected);
-ui.on_message('detection', async message => {
-  printDetection(message);
-  renderDetections();
-  updateFeedback(message);
-});
+ui.on_message('tracks', handleTracks);
 
 // Start the application
 initializeConfidenceSlider();
@@ -55,6 +55,7 @@ function onUIConnected() {
     errorContainer.style.display = 'none';
     errorContainer.textContent = '';
   }
+  ui.send_message('detections_options', DETECTION_OPTIONS);
 }
 
 function onUIDisconnected() {
@@ -64,6 +65,29 @@ function onUIDisconnected() {
   }
 }
 
+// Tracked objects: 'enter' adds an entry to the recent detections, exits clear the feedback
+const activeTracks = new Map();
+
+function handleTracks(frame) {
+  let latest = null;
+  frame.events.forEach(([event, id, content, confidence]) => {
+    if (event === 'exit') {
+      activeTracks.delete(id);
+      return;
+    }
+    latest = { content, confidence, timestamp: frame.ts };
+    activeTracks.set(id, latest);
+    if (event === 'enter') {
+      printDetection(latest);
+    }
+  });
+  renderDetections();
+  if (latest || activeTracks.size === 0) {
+    updateFeedback(latest);
+  }
+  ui.send_message('detections_ack');
+}
+
 function updateFeedback(detection) {
   const objectInfo = {
     cat: { text: 'Meow!', gif: 'cat.webp' },
@@ -80,35 +80,40 @@ function updateFeedback(hasDetections) {
 
 let lastChangeTimestamp = 0;
 let currentState = 'non-person';
+let pendingTimer = null;
 const UPDATE_INTERVAL = 2000; // 2 seconds
 
-function printClassifications(newDetection) {
-  scans.unshift(newDetection);
-  if (scans.length > MAX_RECENT_SCANS) {
-    scans.pop();
+// Messages are sent only when the classifications change: { ts, classifications: [[label, confidence], ...] }
+function printClassifications(frame) {
+  if (frame.classifications.length > 0) {
+    scans.unshift(frame);
+    if (scans.length > MAX_RECENT_SCANS) {
+      scans.pop();
+    }
   }
 
-  // Parsing and handling the result for display
-  try {
-    const detections = JSON.parse(newDetection);
-    const personDetection = detections.find(d => d.content && d.content.toLowerCase() === 'person');
-    const newState = personDetection ? 'person' : 'non-person';
-    const now = Date.now();
-
-    if (newState !== currentState && now - lastChangeTimestamp > UPDATE_INTERVAL) {
-      showDetection(newState);
-      currentState = newState;
-      lastChangeTimestamp = now;
-    }
-  } catch {
-    // In case of parsing error, show neutral state
-    const now = Date.now();
-    if ('non-person' !== currentState && now - lastChangeTimestamp > UPDATE_INTERVAL) {
-      showDetection('non-person');
-      currentState = 'non-person';
-      lastChangeTimestamp = now;
-    }
+  const personDetection = frame.classifications.find(([content]) => content.toLowerCase() === 'person');
+  setState(personDetection ? 'person' : 'non-person');
+}
+
+// A change arriving within UPDATE_INTERVAL of the previous one is applied when the interval
+// ends, since no other message may come to show it
+function setState(newState) {
+  clearTimeout(pendingTimer);
+  pendingTimer = null;
+  if (newState === currentState) {
+    return;
+  }
+
+  const wait = lastChangeTimestamp + UPDATE_INTERVAL - Date.now();
+  if (wait > 0) {
+    pendingTimer = setTimeout(() => setState(newState), wait);
+    return;
   }
+
+  showDetection(newState);
+  currentState = newState;
+  lastChangeTimestamp = Date.now();
 }
 
 function renderClasses() {
@@ -125,51 +130,36 @@ function renderClasses() {
     return;
   }
 
-  scans.forEach(iscan => {
-    try {
-      const iiscan = JSON.parse(iscan);
-
-      if (iiscan.length === 0) {
-        return; // Skip empty detection arrays
-      }
-
-      iiscan.forEach(scan => {
-        const row = document.createElement('div');
-        row.className = 'scan-container';
-
-        // Create a container for content and time
-        const cellContainer = document.createElement('span');
-        cellContainer.className = 'scan-cell-container cell-border';
-
-        // Content (text + icon)
-        const contentText = document.createElement('span');
-        contentText.className = 'scan-content';
-        const value = scan.confidence;
-        const result = Math.floor(value * 1000) / 10;
-        contentText.innerHTML = `${result}% - ${scan.content}`;
-
-        // Time
-        const timeText = document.createElement('span');
-        timeText.className = 'scan-content-time';
-        timeText.textContent = new Date(scan.timestamp).toLocaleString('it-IT').replace(',', ' -');
-
-        // Append content and time to the container
-        cellContainer.appendChild(contentText);
-        cellContainer.appendChild(timeText);
-
-        row.appendChild(cellContainer);
-        recentDetectionsElement.appendChild(row);
-      });
-    } catch (e) {
-      console.error('Failed to parse scan data:', iscan, e);
-      // Display an error in the list itself
-      if (recentDetectionsElement.getElementsByClassName('scan-error').length === 0) {
-        const errorRow = document.createElement('div');
-        errorRow.className = 'scan-error';
-        errorRow.textContent = `Error processing detection data. Check console for details.`;
-        recentDetectionsElement.appendChild(errorRow);
-      }
-    }
+  scans.forEach(frame => {
+    // One timestamp per frame, shared by all its classifications
+    const time = new Date(frame.ts).toLocaleString('it-IT').replace(',', ' -');
+
+    frame.classifications.forEach(([content, confidence]) => {
+      const row = document.createElement('div');
+      row.className = 'scan-container';
+
+      // Create a container for content and time
+      const cellContainer = document.createElement('span');
+      cellContainer.className = 'scan-cell-container cell-border';
+
+      // Content (text + icon)
+      const contentText = document.createElement('span');
+      contentText.className = 'scan-content';
+      const result = Math.floor(confidence * 1000) / 10;
+      contentText.innerHTML = `${result}% - ${content}`;
+
+      // Time
+      const timeText = document.createElement('span');
+      timeText.className = 'scan-content-time';
+      timeText.textContent = time;
+
+      // Append content and time to the container
+      cellContainer.appendChild(contentText);
+      cellContainer.appendChild(timeText);
+
+      row.appendChild(cellContainer);
+      recentDetectionsElement.appendChild(row);
+    });
   });
 }
 
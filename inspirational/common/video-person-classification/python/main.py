@@ -5,8 +5,7 @@
 from arduino.app_utils import App
 from arduino.app_bricks.web_ui import WebUI
 from arduino.app_bricks.video_imageclassification import VideoImageClassification
-from datetime import datetime, UTC
-import json
+import time
 
 ui = WebUI()
 detection_stream = VideoImageClassification(confidence=0.5, debounce_sec=0.0)
@@ -19,23 +18,27 @@ def person_detected():
 
 detection_stream.on_detect("person", person_detected)
 
+# A classification is sent again only when its label set changes or a confidence moves by
+# at least CONFIDENCE_STEP, so a steady scene does not produce a message per frame
+CONFIDENCE_STEP = 0.05
+last_sent = {}
+
+def has_changed(classifications: dict) -> bool:
+  if classifications.keys() != last_sent.keys():
+    return True
+  return any(abs(confidence - last_sent[label]) >= CONFIDENCE_STEP for label, confidence in classifications.items())
+
 # Example usage: Register a callback for when all objects are detected
 def send_detections_to_ui(classifications: dict):
-  if len(classifications) == 0:
-      return
-
-  entries = []
-  for key, value in classifications.items():
-    entry = {
-      "content": key,
-      "confidence": value,
-      "timestamp": datetime.now(UTC).isoformat()
-    }
-    entries.append(entry)
-
-  if len(entries) > 0:
-    msg = json.dumps(entries)
-    ui.send_message("classifications", message=msg)
+  global last_sent
+  if not has_changed(classifications):
+    return
+  last_sent = dict(classifications)
+
+  # One structured message per frame, serialized once by the WebUI, with a single epoch timestamp in ms
+  rows = sorted(([label, round(confidence, 4)] for label, confidence in classifications.items()),
+                key=lambda row: row[1], reverse=True)
+  ui.send_message("classifications", message={"ts": int(time.time() * 1000), "classifications": rows})
 
 detection_stream.on_detect_all(send_detections_to_ui)
 
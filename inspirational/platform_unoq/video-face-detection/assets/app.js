@@ -10,10 +10,14 @@ let detectionTimeout;
 let errorContainer = document.getElementById('error-container');
 let handVisible = false;
 
+// Detections arrive as tracker events, one message per frame. The board drops frames for this page while
+// it has not acknowledged the previous ones, ?max_rate=<fps> caps the rate further.
+const DETECTION_OPTIONS = { ack: true, max_rate: Number(new URLSearchParams(location.search).get('max_rate')) || 0 };
+
 const ui = new WebUI();
 ui.on_connect(onUIConnected);
 ui.on_disconnect(onUIDisconnected);
-ui.on_message('detection', handleDetection);
+ui.on_message('tracks', handleTracks);
 
 // Start the application
 initializeConfidenceSlider();
@@ -56,6 +60,7 @@ function onUIConnected() {
     errorContainer.style.display = 'none';
     errorContainer.textContent = '';
   }
+  ui.send_message('detections_options', DETECTION_OPTIONS);
 }
 
 function onUIDisconnected() {
@@ -65,11 +70,21 @@ function onUIDisconnected() {
   }
 }
 
-function handleDetection(message) {
+// Faces entering the scene are added to the recent detections, updates keep the greeting on
+function handleTracks(frame) {
+  ui.send_message('detections_ack');
+  const seen = frame.events.filter(([event]) => event !== 'exit');
+  if (seen.length === 0) {
+    return;
+  }
   if (detectionTimeout) {
     clearTimeout(detectionTimeout);
   }
-  printDetection(message);
+  seen.forEach(([event, , content, confidence]) => {
+    if (event === 'enter') {
+      printDetection({ content, confidence, timestamp: frame.ts });
+    }
+  });
   renderDetections();
 
   if (!handVisible) {
@@ -0,0 +1,146 @@
+# SPDX-FileCopyrightText: Copyright (C) Arduino s.r.l. and/or its affiliated companies
+#
+# SPDX-License-Identifier: MPL-2.0
+
+import threading
+import time
+import numpy as np
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU of every box in `a` (N, 4) with every box in `b` (M, 4), boxes as [x1, y1, x2, y2]."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+class IoUTracker:
+    """Turns the detections passed to `on_detect_all` into tracked-object events.
+
+    Each detection continues the track of the same label it overlaps the most (greedy
+    matching on the IoU matrix), otherwise it starts a new track. `update` returns
+    event rows [event, track_id, label, confidence, box]:
+
+    - "enter": a new track, with the detection that started it
+    - "update": the latest detection of a track, at most every `update_interval` seconds
+    - "exit": a track that went unmatched for `max_age` seconds, with its last detection
+
+    Detections without a bounding box cannot be tracked and are ignored.
+
+    Args:
+        iou_threshold (float): minimum IoU for a detection to continue a track
+        max_age (float): seconds without a matching detection before a track exits
+        update_interval (float): minimum seconds between two update events of the same track
+    """
+    def __init__(self, iou_threshold: float = 0.3, max_age: float = 1.0, update_interval: float = 1.0):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.update_interval = update_interval
+        self._next_id = 1
+        self._label_codes = {}
+        self._labels = []  # code -> label
+        # One row per live track
+        self._ids = np.empty(0, dtype=np.int64)
+        self._codes = np.empty(0, dtype=np.int64)
+        self._boxes = np.empty((0, 4), dtype=np.float32)
+        self._confidences = np.empty(0, dtype=np.float32)
+        self._last_seen = np.empty(0)
+        self._last_reported = np.empty(0)
+        self._lock = threading.Lock()
+
+    def update(self, detections: dict, now: float = None) -> list[list]:
+        """Feed the detections of a frame, returning the events it caused."""
+        now = time.monotonic() if now is None else now
+        codes, confidences, boxes = [], [], []
+        for label, values in detections.items():
+            for value in values:
+                box = value.get("bounding_box_xyxy")
+                if box is None:
+                    continue
+                codes.append(self._code(label))
+                confidences.append(value.get("confidence") or 0.0)
+                boxes.append(box)
+        codes = np.asarray(codes, dtype=np.int64)
+        confidences = np.asarray(confidences, dtype=np.float32)
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+
+        with self._lock:
+            tracks, matches = self._match(codes, boxes)
+            self._boxes[tracks] = boxes[matches]
+            self._confidences[tracks] = confidences[matches]
+            self._last_seen[tracks] = now
+
+            due = tracks[now - self._last_reported[tracks] >= self.update_interval]
+            self._last_reported[due] = now
+            events = [self._event("update", i) for i in due]
+
+            new = np.setdiff1d(np.arange(len(boxes)), matches)
+            if len(new):
+                first = len(self._ids)
+                self._ids = np.concatenate([self._ids, np.arange(self._next_id, self._next_id + len(new))])
+                self._next_id += len(new)
+                self._codes = np.concatenate([self._codes, codes[new]])
+                self._boxes = np.concatenate([self._boxes, boxes[new]])
+                self._confidences = np.concatenate([self._confidences, confidences[new]])
+                self._last_seen = np.concatenate([self._last_seen, np.full(len(new), now)])
+                self._last_reported = np.concatenate([self._last_reported, np.full(len(new), now)])
+                events.extend(self._event("enter", i) for i in range(first, len(self._ids)))
+
+            events.extend(self._expire(now))
+        return events
+
+    def expire(self, now: float = None) -> list[list]:
+        """Exit events of the tracks that timed out, for when no frame arrives to check them."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self._expire(now)
+
+    def _match(self, codes: np.ndarray, boxes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Greedy matching, highest IoU first: returns the matched track and detection indexes."""
+        if not len(self._ids) or not len(boxes):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        iou = iou_matrix(self._boxes, boxes)
+        iou[self._codes[:, None] != codes[None, :]] = 0
+        rows, cols = np.nonzero(iou >= self.iou_threshold)
+        order = np.argsort(-iou[rows, cols], kind="stable")
+        used_rows, used_cols = set(), set()
+        tracks, matches = [], []
+        for row, col in zip(rows[order].tolist(), cols[order].tolist(), strict=True):
+            if row in used_rows or col in used_cols:
+                continue
+            used_rows.add(row)
+            used_cols.add(col)
+            tracks.append(row)
+            matches.append(col)
+        return np.asarray(tracks, dtype=np.int64), np.asarray(matches, dtype=np.int64)
+
+    def _expire(self, now: float) -> list[list]:
+        expired = now - self._last_seen > self.max_age
+        if not expired.any():
+            return []
+        events = [self._event("exit", i) for i in np.flatnonzero(expired)]
+        keep = ~expired
+        self._ids = self._ids[keep]
+        self._codes = self._codes[keep]
+        self._boxes = self._boxes[keep]
+        self._confidences = self._confidences[keep]
+        self._last_seen = self._last_seen[keep]
+        self._last_reported = self._last_reported[keep]
+        return events
+
+    def _event(self, event: str, index: int) -> list:
+        return [event, int(self._ids[index]), self._labels[self._codes[index]],
+                round(float(self._confidences[index]), 4), self._boxes[index].tolist()]
+
+    def _code(self, label: str) -> int:
+        code = self._label_codes.get(label)
+        if code is None:
+            code = self._label_codes[label] = len(self._labels)
+            self._labels.append(label)
+        return code